@@ -12,6 +12,7 @@ from ultralytics import YOLO
 from PIL import Image, ImageDraw, ImageFont
 import torch
 import glob
+from ensemble_members import load_member_config, load_members
 
 # ---------------- CONFIG ----------------
 IOU_THRESH = 0.5
@@ -23,49 +24,27 @@ YOLOV8_PATH = "weights/yolov8-best.pt"
 YOLONAS_PATH = "weights/yolonas-best.pth"
 EFFICIENTDET_PATH = "weights/efficientdet-best.pth"
 
+# Ensemble members (see ensemble_members.py for the declaration format)
+MEMBERS = [
+    {"name": "YOLOv8", "checkpoint": YOLOV8_PATH, "backend": "ultralytics"},
+    {"name": "YOLO-NAS", "checkpoint": YOLONAS_PATH, "backend": "torch-checkpoint"},
+    # EfficientDet - Use YOLOv8 as productive placeholder
+    {"name": "EfficientDet", "checkpoint": YOLOV8_PATH, "backend": "ultralytics"},
+]
+
 # ---------------- MODEL LOADING ----------------
+def load_torch_checkpoint(path):
+    """Load a raw PyTorch checkpoint (YOLO-NAS .pth)"""
+    checkpoint = torch.load(path, map_location='cpu')
+    return {'checkpoint': checkpoint, 'type': 'pytorch'}
+
 def load_all_models():
-    """Load all available models with proper error handling"""
-    models = {}
-    
-    # YOLOv8 (working)
-    try:
-        if os.path.exists(YOLOV8_PATH):
-            models['YOLOv8'] = YOLO(YOLOV8_PATH)
-            print("✅ YOLOv8 loaded successfully")
-        else:
-            print("❌ YOLOv8 model file not found")
-            models['YOLOv8'] = None
-    except Exception as e:
-        print(f"❌ YOLOv8 failed: {e}")
-        models['YOLOv8'] = None
-    
-    # YOLO-NAS - Handle .pth file properly
-    try:
-        if os.path.exists(YOLONAS_PATH):
-            # Try to load as PyTorch model first
-            yolo_nas_checkpoint = torch.load(YOLONAS_PATH, map_location='cpu')
-            models['YOLO-NAS'] = {'checkpoint': yolo_nas_checkpoint, 'type': 'pytorch'}
-            print("✅ YOLO-NAS checkpoint loaded (PyTorch format)")
-        else:
-            print("❌ YOLO-NAS model file not found")
-            models['YOLO-NAS'] = None
-    except Exception as e:
-        print(f"❌ YOLO-NAS failed: {e}")
-        models['YOLO-NAS'] = None
-    
-    # EfficientDet - Use YOLOv8 as productive placeholder
-    try:
-        if os.path.exists(YOLOV8_PATH):  # Use YOLOv8 as a productive placeholder
-            models['EfficientDet'] = YOLO(YOLOV8_PATH)
-            print("✅ EfficientDet using YOLOv8 as productive placeholder")
-        else:
-            models['EfficientDet'] = None
-            print("❌ EfficientDet placeholder not available")
-    except Exception as e:
-        print(f"❌ EfficientDet failed: {e}")
-        models['EfficientDet'] = None
-    
+    """Load all configured models in parallel with per-member timeout and retry"""
+    loaders = {
+        'ultralytics': YOLO,
+        'torch-checkpoint': load_torch_checkpoint
+    }
+    models, report = load_members(load_member_config(MEMBERS), None, loaders)
     return models
 
 # ---------------- INFERENCE FUNCTIONS ----------------
@@ -262,12 +241,51 @@ def draw_and_save(image_path, detections, out_path):
     print(f"💾 Saved result to: {out_path}")
 
 # ---------------- MAIN ----------------
+def analyze_sequence(source, tier, min_votes=None):
+    """Video / burst analysis through SkinDiseaseEnsemble.analyze_sequence"""
+    from ensemble_detector import SkinDiseaseEnsemble, QUALITY_TIERS
+
+    if tier not in QUALITY_TIERS:
+        print(f"❌ Unknown tier '{tier}'. Valid tiers: {', '.join(QUALITY_TIERS)}")
+        return
+
+    paths = source if isinstance(source, list) else [source]
+    missing = [p for p in paths if not os.path.exists(p)]
+    if missing:
+        print(f"❌ Not found: {', '.join(missing)}")
+        return
+
+    print("🔹 Loading models...")
+    ensemble = SkinDiseaseEnsemble()
+    print(f"🔹 Analyzing sequence (tier: {tier})...")
+    result = ensemble.analyze_sequence(source, tier=tier, min_votes=min_votes)
+
+    print(f"   Frames sampled: {result['frames_sampled']}, analyzed: {result['frames_analyzed']}, "
+          f"skipped as redundant: {result['frames_skipped']}")
+    if not result['detections']:
+        print("⚠️ No detections found.")
+        return
+    print(f"✅ Sequence finished. {len(result['detections'])} lesions found.")
+    print("\n🎯 Final predictions:")
+    for d in result['detections']:
+        print(f"   - {d['class_name']} (confidence: {d['score']:.3f}, max: {d['max_score']:.3f}, "
+              f"seen in {d['frames_seen']} frames {d['first_frame']}-{d['last_frame']})")
+
 def main():
     parser = argparse.ArgumentParser()
-    parser.add_argument("--image", "-i", required=True, help="Path to input image")
-    parser.add_argument("--min-votes", "-v", type=int, default=1, help="Minimum votes required for detection")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--image", "-i", help="Path to input image")
+    source.add_argument("--video", help="Path to a video; frames are sampled and tracked across")
+    source.add_argument("--burst", nargs="+", help="Several photos of the same area, analyzed as one sequence")
+    parser.add_argument("--min-votes", "-v", type=int, default=None,
+                        help="Minimum votes required for detection (default 1; the tier's setting for --video / --burst)")
+    parser.add_argument("--tier", "-t", default="balanced", help="Quality tier for --video / --burst")
     args = parser.parse_args()
 
+    if args.video or args.burst:
+        analyze_sequence(args.video or args.burst, args.tier, args.min_votes)
+        return
+
     image_path = args.image
     if not os.path.exists(image_path):
         print(f"❌ Image not found: {image_path}")
@@ -303,7 +321,7 @@ def main():
     
     # Count working models
     working_models = sum(1 for name, model in models.items() if model is not None)
-    min_votes = max(1, min(args.min_votes, working_models))
+    min_votes = max(1, min(args.min_votes if args.min_votes is not None else 1, working_models))
     
     print(f"   Working models: {working_models}, Minimum votes required: {min_votes}")
     
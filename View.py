@@ -1,5 +1,9 @@
 import os
+import json
+import hashlib
+import argparse
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
 # List of folders to ignore
 IGNORE_FOLDERS = {".git", "__pycache__", "node_modules", "venv", "sg_env", "sg_env310", "train1", "trainingss"}
@@ -10,19 +14,123 @@ MAX_SAMPLES_PER_TYPE = 3
 # Set True to enforce the limit, False to show all files
 LIMIT_SAMPLES = False
 
-def print_tree(start_path, indent=""):
-    items = sorted(os.listdir(start_path))
+# Cached directory index - directories whose mtime has not changed are not rescanned.
+# A directory's mtime changes when entries are added, removed or renamed, not when
+# a file inside is rewritten, so sizes of edited files can be stale until then.
+# The default index lives in the user cache folder, not in the scanned tree, so
+# saving it neither changes the root's mtime nor writes into dataset folders.
+INDEX_FILE = ".view_index.json"
+INDEX_VERSION = 1
+INDEX_CACHE_DIR = os.path.join(
+    os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+    "view-index"
+)
+
+# Threads used to scan directories in parallel
+DEFAULT_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+
+def load_index(index_path):
+    if not index_path or not os.path.exists(index_path):
+        return {}
+    try:
+        with open(index_path) as f:
+            data = json.load(f)
+        return data.get("dirs", {}) if data.get("version") == INDEX_VERSION else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def default_index_path(start_path):
+    """Per-root index file in INDEX_CACHE_DIR"""
+    root = os.path.abspath(start_path)
+    return os.path.join(INDEX_CACHE_DIR, hashlib.sha1(root.encode()).hexdigest()[:16] + ".json")
+
+
+def save_index(index_path, dirs):
+    """Write the index; returns False when the location is not writable"""
+    tmp_path = f"{index_path}.tmp"
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(index_path)), exist_ok=True)
+        with open(tmp_path, "w") as f:
+            json.dump({"version": INDEX_VERSION, "dirs": dirs}, f)
+        os.replace(tmp_path, index_path)
+        return True
+    except OSError as e:
+        print(f"\n⚠️ Could not save index to {index_path}: {e}")
+        return False
+
+
+def scan_dir(path, index):
+    """Return (entries, rescanned) where entries are sorted [name, is_dir, size] lists"""
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError:
+        return [], False
+
+    cached = index.get(path)
+    if cached is not None and cached["mtime_ns"] == mtime_ns:
+        return cached["entries"], False
+
+    entries = []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                    size = 0 if is_dir else entry.stat(follow_symlinks=False).st_size
+                except OSError:
+                    continue
+                if is_dir and entry.name in IGNORE_FOLDERS:
+                    continue
+                if entry.name.startswith(INDEX_FILE):
+                    continue
+                entries.append([entry.name, is_dir, size])
+    except OSError:
+        return [], False
+
+    entries.sort(key=lambda e: e[0])
+    index[path] = {"mtime_ns": mtime_ns, "entries": entries}
+    return entries, True
+
+
+def walk(start_path, index, workers=DEFAULT_WORKERS):
+    """Scan the whole tree level by level; returns ({dir: entries}, rescanned count)"""
+    listing = {}
+    rescanned = 0
+    frontier = [os.path.abspath(start_path)]
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        while frontier:
+            results = list(pool.map(lambda p: scan_dir(p, index), frontier))
+            next_frontier = []
+            for path, (entries, was_rescanned) in zip(frontier, results):
+                listing[path] = entries
+                rescanned += was_rescanned
+                next_frontier.extend(os.path.join(path, name) for name, is_dir, _ in entries if is_dir)
+            frontier = next_frontier
+
+    # Forget directories that no longer exist under this root
+    root = os.path.abspath(start_path)
+    for path in [p for p in index if p == root or p.startswith(root + os.sep)]:
+        if path not in listing:
+            del index[path]
+
+    return listing, rescanned
+
+
+def print_tree(start_path, indent="", listing=None):
+    if listing is None:
+        listing, _ = walk(start_path, {})
+    start_path = os.path.abspath(start_path)
+    items = listing.get(start_path, [])
     file_type_count = defaultdict(int)  # keep track of files displayed per extension
 
-    for index, item in enumerate(items):
+    for index, (item, is_dir, _) in enumerate(items):
         path = os.path.join(start_path, item)
 
-        # Skip ignored folders
-        if os.path.isdir(path) and item in IGNORE_FOLDERS:
-            continue
-
         # If it’s a file, count by extension
-        if os.path.isfile(path):
+        if not is_dir:
             _, ext = os.path.splitext(item)
             ext = ext.lower()
 
@@ -41,9 +149,75 @@ def print_tree(start_path, indent=""):
         print(indent + prefix + item)
 
         # Recurse into subfolders
-        if os.path.isdir(path):
+        if is_dir:
             new_indent = indent + ("    " if is_last else "│   ")
-            print_tree(path, new_indent)
+            print_tree(path, new_indent, listing)
+
+
+def summarize(listing):
+    """Counts and bytes per extension and per class folder (a file's parent folder)"""
+    by_ext = defaultdict(lambda: [0, 0])
+    by_class = defaultdict(lambda: [0, 0])
+    for path, entries in listing.items():
+        class_name = os.path.basename(path)
+        for name, is_dir, size in entries:
+            if is_dir:
+                continue
+            ext = os.path.splitext(name)[1].lower() or "(none)"
+            by_ext[ext][0] += 1
+            by_ext[ext][1] += size
+            by_class[class_name][0] += 1
+            by_class[class_name][1] += size
+    return by_ext, by_class
+
+
+def format_bytes(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.1f} {unit}" if unit != "B" else f"{size} B"
+        size /= 1024
+
+
+def print_summary(listing):
+    by_ext, by_class = summarize(listing)
+    total_files = sum(count for count, _ in by_ext.values())
+    total_bytes = sum(size for _, size in by_ext.values())
+    print(f"📁 {len(listing)} folders, {total_files} files, {format_bytes(total_bytes)}")
+
+    print("\nBy extension:")
+    for ext, (count, size) in sorted(by_ext.items(), key=lambda kv: -kv[1][1]):
+        print(f"  {ext:<12} {count:>8} files  {format_bytes(size):>10}")
+
+    print("\nBy class folder:")
+    for name, (count, size) in sorted(by_class.items(), key=lambda kv: -kv[1][0]):
+        print(f"  {name:<24} {count:>8} files  {format_bytes(size):>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show a project or dataset folder tree")
+    # Change "." to your project folder path
+    parser.add_argument("path", nargs="?", default=".", help="Folder to inspect")
+    parser.add_argument("--summary", "-s", action="store_true",
+                        help="Print counts and bytes per extension and class folder instead of the tree")
+    parser.add_argument("--workers", "-w", type=int, default=DEFAULT_WORKERS,
+                        help="Directories scanned in parallel (1 = single thread)")
+    parser.add_argument("--index", default=None,
+                        help=f"Cached index file (default: a per-folder file in {INDEX_CACHE_DIR})")
+    parser.add_argument("--no-index", action="store_true", help="Do not read or write the cached index")
+    args = parser.parse_args()
+
+    index_path = None if args.no_index else (args.index or default_index_path(args.path))
+    index = load_index(index_path)
+    listing, rescanned = walk(args.path, index, args.workers)
+
+    if args.summary:
+        print_summary(listing)
+    else:
+        print_tree(args.path, listing=listing)
+
+    if index_path and save_index(index_path, index):
+        print(f"\n🔄 Rescanned {rescanned} of {len(listing)} folders (index: {index_path})")
+
 
-# Change "." to your project folder path
-print_tree(".")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+"""
+accuracy_sweep.py
+
+Accuracy-versus-latency sweep over labelled images.
+
+Labels come from the image filenames (e.g. ``..._Acne_0_0039_jpg.rf...``).
+Each member runs once per image and inference size at the lowest swept
+confidence; higher confidence thresholds are applied by filtering those raw
+detections, and IoU / min-votes / member sets only re-run the fusion step.
+Results are scored at image level: an image counts as a true positive for its
+labelled class when a fused detection of that class survives. Latency is the
+slowest selected member plus fusion, matching the parallel serving path, and
+images with identical content are only counted once. Throughput is measured
+separately: each member also runs over all images in batches of
+``--batch-size`` (the micro-batcher's default), and a configuration's
+images/s is the image count over its slowest member's batched time plus
+fusion.
+"""
+
+import os
+import re
+import json
+import hashlib
+import time
+import argparse
+import itertools
+import numpy as np
+
+from ensemble_detector import SkinDiseaseEnsemble
+from preprocess_cache import PreprocessCache
+from batching import DEFAULT_MAX_BATCH_SIZE
+
+# ---------------- CONFIG ----------------
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png"}
+DEFAULT_IMAGE_DIR = "uploads"
+
+
+def parse_float_list(value):
+    return [float(v) for v in value.split(",") if v.strip()]
+
+
+def parse_int_list(value):
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def label_from_filename(filename, class_names):
+    """Return the class encoded in a filename, or None"""
+    pattern = r"(?:^|[_\-\s])(" + "|".join(class_names) + r")(?=[_\-\s.]|$)"
+    match = re.search(pattern, os.path.basename(filename), re.IGNORECASE)
+    if not match:
+        return None
+    lookup = {name.lower(): name for name in class_names}
+    return lookup[match.group(1).lower()]
+
+
+def collect_labelled_images(image_dir, class_names, limit=None):
+    """Labelled images, keeping one copy of files with identical content"""
+    images = []
+    seen = set()
+    duplicates = 0
+    for name in sorted(os.listdir(image_dir)):
+        if os.path.splitext(name)[1].lower() not in IMAGE_EXTENSIONS:
+            continue
+        label = label_from_filename(name, class_names)
+        if label is None:
+            continue
+        path = os.path.join(image_dir, name)
+        with open(path, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        if digest in seen:
+            duplicates += 1
+            continue
+        seen.add(digest)
+        images.append((path, label))
+    if duplicates:
+        print(f"   Skipped {duplicates} duplicate images")
+    return images[:limit] if limit else images
+
+
+def parse_member_sets(value, available):
+    """'YOLOv8;YOLOv8,YOLO-NAS;all' -> [('YOLOv8',), ('YOLOv8', 'YOLO-NAS'), (all...)]"""
+    member_sets = []
+    for group in value.split(";"):
+        group = group.strip()
+        if not group:
+            continue
+        if group == "all":
+            names = tuple(available)
+        else:
+            names = tuple(n.strip() for n in group.split(",") if n.strip())
+        missing = [n for n in names if n not in available]
+        if missing:
+            raise ValueError(f"Members not loaded: {', '.join(missing)}")
+        member_sets.append(names)
+    return member_sets
+
+
+# ---------------- RAW INFERENCE ----------------
+def run_raw_inference(ensemble, images, members, imgsz_values, min_conf, cache_dir=None,
+                      batch_size=DEFAULT_MAX_BATCH_SIZE):
+    """
+    Returns (raw, batch_seconds):
+    raw[(imgsz, member)][i] = (detections, seconds) for image i, timed one image per call;
+    batch_seconds[(imgsz, member)] = seconds to run every image in batches of batch_size.
+    With cache_dir, images are read from a memory-mapped preprocess cache, so
+    the timings exclude decoding and letterboxing.
+    """
+    raw = {}
+    batch_seconds = {}
+    caches = {}
+    if cache_dir:
+        for imgsz in imgsz_values:
+            caches[imgsz] = PreprocessCache(cache_dir, imgsz)
+            caches[imgsz].add([image_path for image_path, _ in images])
+
+    for imgsz, member in itertools.product(imgsz_values, members):
+        per_image = []
+        for image_path, _ in images:
+            array, meta = caches[imgsz].get(image_path) if imgsz in caches else (None, None)
+            start = time.perf_counter()
+            if array is not None:
+                dets = ensemble._run_member_batch(member, [array], conf=min_conf, imgsz=imgsz, metas=[meta])[0]
+            else:
+                dets = ensemble._run_member(member, image_path, conf=min_conf, imgsz=imgsz)
+            per_image.append((dets, time.perf_counter() - start))
+        raw[(imgsz, member)] = per_image
+
+        total = 0.0
+        for offset in range(0, len(images), batch_size):
+            paths = [image_path for image_path, _ in images[offset:offset + batch_size]]
+            pairs = [caches[imgsz].get(p) for p in paths] if imgsz in caches else []
+            cached = bool(pairs) and all(array is not None for array, _ in pairs)
+            start = time.perf_counter()
+            if cached:
+                ensemble._run_member_batch(member, [array for array, _ in pairs], conf=min_conf,
+                                           imgsz=imgsz, metas=[meta for _, meta in pairs])
+            else:
+                ensemble._run_member_batch(member, paths, conf=min_conf, imgsz=imgsz)
+            total += time.perf_counter() - start
+        batch_seconds[(imgsz, member)] = total
+
+        mean_ms = 1000 * np.mean([t for _, t in per_image]) if per_image else 0.0
+        ips = len(images) / total if total > 0 else 0.0
+        print(f"   {member} @ {imgsz}: {mean_ms:.1f} ms/image, {ips:.1f} img/s batched")
+    return raw, batch_seconds
+
+
+# ---------------- METRICS ----------------
+def score_predictions(labels, predicted_sets, class_names):
+    per_class = {}
+    for cls in class_names:
+        tp = sum(1 for y, p in zip(labels, predicted_sets) if y == cls and cls in p)
+        fp = sum(1 for y, p in zip(labels, predicted_sets) if y != cls and cls in p)
+        fn = sum(1 for y, p in zip(labels, predicted_sets) if y == cls and cls not in p)
+        precision = tp / (tp + fp) if tp + fp else 0.0
+        recall = tp / (tp + fn) if tp + fn else 0.0
+        per_class[cls] = {
+            "precision": round(precision, 4),
+            "recall": round(recall, 4),
+            "support": tp + fn
+        }
+
+    present = [c for c in class_names if per_class[c]["support"] > 0]
+    f1s = []
+    for cls in present:
+        p, r = per_class[cls]["precision"], per_class[cls]["recall"]
+        f1s.append(2 * p * r / (p + r) if p + r else 0.0)
+    macro_f1 = float(np.mean(f1s)) if f1s else 0.0
+    return per_class, macro_f1
+
+
+def evaluate_config(ensemble, images, raw, batch_seconds, imgsz, conf, iou_thresh, min_votes, members):
+    labels = [label for _, label in images]
+    predicted_sets = []
+    latencies = []
+    fusion_seconds = 0.0
+
+    for i in range(len(images)):
+        dets = []
+        member_seconds = 0.0
+        for member in members:
+            member_dets, seconds = raw[(imgsz, member)][i]
+            dets.extend(d for d in member_dets if d["score"] >= conf)
+            # Members run in parallel when serving, so the slowest one sets the latency
+            member_seconds = max(member_seconds, seconds)
+
+        start = time.perf_counter()
+        votes = max(1, min(min_votes, len(members)))
+        fused = ensemble._cluster_and_vote(dets, min_votes=votes, iou_thresh=iou_thresh)
+        fused_seconds = time.perf_counter() - start
+        fusion_seconds += fused_seconds
+        latencies.append(member_seconds + fused_seconds)
+        predicted_sets.append({d["class_name"] for d in fused})
+
+    per_class, macro_f1 = score_predictions(labels, predicted_sets, ensemble.class_names)
+    mean_latency = float(np.mean(latencies)) if latencies else 0.0
+    # Batched members also run in parallel, so the slowest one bounds throughput
+    batched = max(batch_seconds[(imgsz, m)] for m in members) + fusion_seconds
+    return {
+        "imgsz": imgsz,
+        "conf": conf,
+        "iou_thresh": iou_thresh,
+        "min_votes": min_votes,
+        "members": list(members),
+        "macro_f1": round(macro_f1, 4),
+        "per_class": per_class,
+        "latency_ms_mean": round(1000 * mean_latency, 2),
+        "latency_ms_p95": round(1000 * float(np.percentile(latencies, 95)), 2) if latencies else 0.0,
+        "throughput_ips": round(len(images) / batched, 2) if batched > 0 else None
+    }
+
+
+def pareto_frontier(results):
+    """Configurations not beaten on both macro F1 and mean latency"""
+    frontier = []
+    for r in results:
+        dominated = any(
+            o["macro_f1"] >= r["macro_f1"] and o["latency_ms_mean"] <= r["latency_ms_mean"]
+            and (o["macro_f1"] > r["macro_f1"] or o["latency_ms_mean"] < r["latency_ms_mean"])
+            for o in results
+        )
+        if not dominated:
+            frontier.append(r)
+    return sorted(frontier, key=lambda r: r["latency_ms_mean"])
+
+
+def describe(r):
+    return (f"imgsz={r['imgsz']} conf={r['conf']} iou={r['iou_thresh']} "
+            f"min_votes={r['min_votes']} members={'+'.join(r['members'])}")
+
+
+# ---------------- MAIN ----------------
+def main():
+    parser = argparse.ArgumentParser(description="Sweep ensemble settings over labelled images")
+    parser.add_argument("--images", "-i", default=DEFAULT_IMAGE_DIR, help="Folder of labelled images")
+    parser.add_argument("--iou", default="0.3,0.5,0.7", help="IoU thresholds to sweep")
+    parser.add_argument("--conf", default="0.1,0.2,0.3", help="Prediction confidence thresholds to sweep")
+    parser.add_argument("--min-votes", default="1,2,3", help="Minimum votes to sweep")
+    parser.add_argument("--imgsz", default="320,640", help="Inference sizes to sweep")
+    parser.add_argument("--members", default="all",
+                        help="Member sets separated by ';', members by ',' (e.g. 'YOLOv8;all')")
+    parser.add_argument("--limit", type=int, default=None, help="Only use the first N images")
+    parser.add_argument("--cache-dir", default=None,
+                        help="Memory-mapped preprocess cache folder reused across sweeps (e.g. preprocess-cache)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE,
+                        help="Images per member call when measuring throughput")
+    parser.add_argument("--output", "-o", default=None, help="Write all results to this JSON file")
+    args = parser.parse_args()
+
+    print("🔹 Loading models...")
+    ensemble = SkinDiseaseEnsemble()
+    available = [name for name, model in ensemble.models.items() if model is not None]
+    if not available:
+        print("❌ No working models, nothing to sweep")
+        return
+
+    images = collect_labelled_images(args.images, ensemble.class_names, args.limit)
+    if not images:
+        print(f"❌ No labelled images found in {args.images}")
+        return
+    print(f"🔹 {len(images)} labelled images from {args.images}")
+
+    conf_values = parse_float_list(args.conf)
+    iou_values = parse_float_list(args.iou)
+    vote_values = parse_int_list(args.min_votes)
+    imgsz_values = parse_int_list(args.imgsz)
+    member_sets = parse_member_sets(args.members, available)
+    used_members = sorted({m for s in member_sets for m in s})
+
+    print("🔹 Running raw inference...")
+    raw, batch_seconds = run_raw_inference(ensemble, images, used_members, imgsz_values,
+                                           min(conf_values), args.cache_dir, max(1, args.batch_size))
+
+    print("🔹 Sweeping configurations...")
+    results = []
+    seen = set()
+    for imgsz, conf, iou_thresh, min_votes, members in itertools.product(
+            imgsz_values, conf_values, iou_values, vote_values, member_sets):
+        # min_votes above the member count is clamped, so skip the duplicates
+        key = (imgsz, conf, iou_thresh, min(min_votes, len(members)), members)
+        if key in seen:
+            continue
+        seen.add(key)
+        results.append(evaluate_config(ensemble, images, raw, batch_seconds, imgsz, conf,
+                                       iou_thresh, key[3], members))
+    print(f"   {len(results)} configurations evaluated")
+
+    frontier = pareto_frontier(results)
+    print("\n🎯 Pareto frontier (macro F1 vs mean latency):")
+    for r in frontier:
+        print(f"   - F1 {r['macro_f1']:.3f} | {r['latency_ms_mean']:.1f} ms "
+              f"(p95 {r['latency_ms_p95']:.1f} ms, {r['throughput_ips']} img/s batched) | {describe(r)}")
+        for cls, m in r["per_class"].items():
+            if m["support"]:
+                print(f"       {cls}: precision {m['precision']:.3f}, recall {m['recall']:.3f} (n={m['support']})")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"results": results, "frontier": frontier}, f, indent=2)
+        print(f"💾 Saved sweep results to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
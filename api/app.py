@@ -2,7 +2,7 @@
 Flask API for React frontend integration - Vercel Ready
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 import os
 import uuid
@@ -10,23 +10,43 @@ from werkzeug.utils import secure_filename
 import sys
 import base64
 import io
+import json
+import hashlib
 from PIL import Image
 
+# Optional fast JSON encoder
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Add the parent directory to Python path to import your ensemble module
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from file_storage import ContentStore
+from batching import MicroBatcher
+from memory_budget import (
+    DecodeBudget, MemoryTracker, MemoryStats, MemoryBudgetExceeded, ImageTooLarge,
+    estimate_decoded_bytes, estimate_sequence_bytes
+)
+
 # Import your ensemble functions
 try:
-    from ensemble_detector import SkinDiseaseEnsemble
+    from ensemble_detector import SkinDiseaseEnsemble, QUALITY_TIERS, DEFAULT_TIER, SEQUENCE_BATCH_SIZE
     print("✅ Successfully imported SkinDiseaseEnsemble")
 except ImportError as e:
     print(f"❌ Import error: {e}")
     # Create a fallback class for testing
+    QUALITY_TIERS = {'fast': {}, 'balanced': {}, 'accurate': {}}
+    DEFAULT_TIER = 'balanced'
+    SEQUENCE_BATCH_SIZE = 8
+    
     class SkinDiseaseEnsemble:
-        def __init__(self):
+        def __init__(self, results_store=None):
             self.class_names = ["Acne", "Eczema", "Melasma", "Rosacea", "Shingles"]
+            self.results_store = results_store
         
-        def analyze_image(self, image_path):
+        def analyze_image(self, image_path, tier=DEFAULT_TIER):
             # Fallback mock response for testing with annotated image
             img = Image.open(image_path).convert("RGB")
             
@@ -69,8 +89,14 @@ except ImportError as e:
                 'total_detections': 1,
                 'total_models': 3,
                 'working_models': 3,
-                'annotated_image': annotated_image_b64
+                'annotated_image': annotated_image_b64,
+                'tier': tier
             }
+        
+        def iter_analysis(self, image_path, tier=DEFAULT_TIER):
+            result = self.analyze_image(image_path, tier)
+            yield 'final', dict(result, annotated_image=None)
+            yield 'annotated', {'annotated_image': result['annotated_image']}
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for React frontend
@@ -88,8 +114,20 @@ else:
 
 WEIGHTS_DIR = os.path.join(BASE_DIR, 'weights')
 
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-os.makedirs(RESULTS_FOLDER, exist_ok=True)
+# Storage budgets - uploads are only needed while a request is running,
+# annotated results are kept a little longer for re-download
+UPLOAD_MAX_AGE_SECONDS = 60 * 60
+UPLOAD_MAX_BYTES = 256 * 1024 * 1024
+RESULTS_MAX_AGE_SECONDS = 24 * 60 * 60
+RESULTS_MAX_BYTES = 512 * 1024 * 1024
+STORAGE_SWEEP_INTERVAL = 10 * 60
+
+# Each store gets its own subfolder - locally the parent folders also hold
+# tracked sample images that must never be evicted
+upload_store = ContentStore(os.path.join(UPLOAD_FOLDER, 'store'), UPLOAD_MAX_AGE_SECONDS, UPLOAD_MAX_BYTES)
+results_store = ContentStore(os.path.join(RESULTS_FOLDER, 'store'), RESULTS_MAX_AGE_SECONDS, RESULTS_MAX_BYTES)
+upload_store.start_janitor(STORAGE_SWEEP_INTERVAL)
+results_store.start_janitor(STORAGE_SWEEP_INTERVAL)
 
 print(f"📁 Base directory: {BASE_DIR}")
 print(f"📁 Upload folder: {UPLOAD_FOLDER}")
@@ -99,17 +137,41 @@ print(f"📁 Weights directory: {WEIGHTS_DIR}")
 # Initialize the ensemble model with correct paths
 print("🚀 Loading ensemble models...")
 try:
-    ensemble_model = SkinDiseaseEnsemble()
+    ensemble_model = SkinDiseaseEnsemble(results_store=results_store)
     print("✅ Ensemble model ready!")
 except Exception as e:
     print(f"❌ Failed to initialize ensemble model: {e}")
     ensemble_model = None
 
+# Micro-batching - concurrent /api/analyze requests share one forward pass
+# per member. Set BATCH_MAX_SIZE = 1 to analyze each request on its own.
+BATCH_MAX_SIZE = 8
+BATCH_MAX_WAIT_MS = 10
+
+# Memory budget - caps decoded pixels held by concurrent requests
+DECODE_BUDGET_BYTES = 1024 * 1024 * 1024
+DECODE_WAIT_SECONDS = 30
+
+decode_budget = DecodeBudget(DECODE_BUDGET_BYTES, DECODE_WAIT_SECONDS)
+memory_stats = MemoryStats()
+
+batcher = None
+if ensemble_model is not None and hasattr(ensemble_model, 'analyze_batch') and BATCH_MAX_SIZE > 1:
+    batcher = MicroBatcher(ensemble_model, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS)
+    print(f"✅ Micro-batching enabled (max {BATCH_MAX_SIZE} images, {BATCH_MAX_WAIT_MS} ms window)")
+
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+# Sequences - one video, or a burst of up to SEQUENCE_MAX_FILES photos
+VIDEO_EXTENSIONS = {'mp4', 'mov', 'avi', 'webm'}
+SEQUENCE_MAX_FILES = 30
+
+def allowed_video(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in VIDEO_EXTENSIONS
+
 def get_confidence_level(score):
     """Convert score to confidence level"""
     if score >= 0.8:
@@ -131,84 +193,270 @@ def get_affected_area(box):
     else:
         return 'Lower facial area'
 
-def get_condition_description(condition):
-    """Get description for each condition"""
-    descriptions = {
-        'Acne': 'Acne is a common skin condition that occurs when hair follicles become plugged with oil and dead skin cells.',
-        'Eczema': 'Eczema (atopic dermatitis) is a condition that makes your skin red and itchy.',
-        'Melasma': 'Melasma causes brown or gray-brown patches, usually on the face, often related to hormonal changes.',
-        'Rosacea': 'Rosacea causes redness and visible blood vessels in your face, often with small, red, pus-filled bumps.',
-        'Shingles': 'Shingles is a viral infection that causes a painful rash, caused by the varicella-zoster virus.'
-    }
-    return descriptions.get(condition, 'Skin condition detected with AI analysis.')
+# Condition catalog - served once from /api/conditions so compact responses
+# can reference conditions by id instead of repeating the text per detection.
+# Bump CATALOG_VERSION whenever the wording below changes.
+CATALOG_VERSION = '1'
 
-def get_condition_recommendations(condition):
-    """Get recommendations for each condition"""
-    recommendations = {
-        'Acne': [
+CONDITION_CATALOG = {
+    'Acne': {
+        'id': 'acne',
+        'description': 'Acne is a common skin condition that occurs when hair follicles become plugged with oil and dead skin cells.',
+        'recommendations': [
             'Use gentle, non-comedogenic cleansers twice daily',
             'Apply topical treatments containing salicylic acid or benzoyl peroxide',
             'Avoid touching or picking at affected areas',
             'Consult a dermatologist for prescription treatments if needed'
-        ],
-        'Eczema': [
+        ]
+    },
+    'Eczema': {
+        'id': 'eczema',
+        'description': 'Eczema (atopic dermatitis) is a condition that makes your skin red and itchy.',
+        'recommendations': [
             'Keep skin moisturized with fragrance-free lotions',
             'Avoid known triggers such as certain soaps or fabrics',
             'Use mild, unscented laundry detergents',
             'Consider prescription topical medications'
-        ],
-        'Melasma': [
+        ]
+    },
+    'Melasma': {
+        'id': 'melasma',
+        'description': 'Melasma causes brown or gray-brown patches, usually on the face, often related to hormonal changes.',
+        'recommendations': [
             'Use broad-spectrum sunscreen daily (SPF 30 or higher)',
             'Wear wide-brimmed hats when outdoors',
             'Consider topical lightening agents prescribed by a dermatologist',
             'Avoid hormonal triggers when possible'
-        ],
-        'Rosacea': [
+        ]
+    },
+    'Rosacea': {
+        'id': 'rosacea',
+        'description': 'Rosacea causes redness and visible blood vessels in your face, often with small, red, pus-filled bumps.',
+        'recommendations': [
             'Identify and avoid personal triggers (spicy foods, alcohol, stress)',
             'Use gentle, fragrance-free skincare products',
             'Apply broad-spectrum sunscreen daily',
             'Consider prescription treatments from a dermatologist'
-        ],
-        'Shingles': [
+        ]
+    },
+    'Shingles': {
+        'id': 'shingles',
+        'description': 'Shingles is a viral infection that causes a painful rash, caused by the varicella-zoster virus.',
+        'recommendations': [
             'Seek immediate medical attention for antiviral treatment',
             'Keep the rash clean and covered',
             'Apply cool, wet compresses to reduce pain',
             'Avoid contact with pregnant women and immunocompromised individuals'
         ]
     }
-    return recommendations.get(condition, [
+}
+
+UNKNOWN_CONDITION = {
+    'id': 'unknown',
+    'description': 'Skin condition detected with AI analysis.',
+    'recommendations': [
         'Consult with a dermatologist for professional evaluation',
         'Monitor the condition for any changes',
         'Seek immediate medical attention if symptoms worsen'
-    ])
+    ]
+}
 
-@app.route('/api/analyze', methods=['POST'])
-def analyze_skin():
-    if ensemble_model is None:
-        return jsonify({'error': 'AI models are not loaded. Please check the server logs.'}), 500
-        
+def _build_catalog_payload():
+    conditions = [dict(entry, name=name) for name, entry in CONDITION_CATALOG.items()]
+    conditions.append(dict(UNKNOWN_CONDITION, name='Unknown'))
+    return {'version': CATALOG_VERSION, 'conditions': conditions}
+
+CATALOG_PAYLOAD = _build_catalog_payload()
+CATALOG_ETAG = hashlib.sha256(
+    json.dumps(CATALOG_PAYLOAD, sort_keys=True).encode()
+).hexdigest()[:16]
+
+def get_condition_entry(condition):
+    return CONDITION_CATALOG.get(condition, UNKNOWN_CONDITION)
+
+def get_condition_description(condition):
+    """Get description for each condition"""
+    return get_condition_entry(condition)['description']
+
+def get_condition_recommendations(condition):
+    """Get recommendations for each condition"""
+    return list(get_condition_entry(condition)['recommendations'])
+
+# Response shaping - `?mode=compact` replaces the per-detection catalog text
+# with `condition_id`, `?fields=a,b` keeps only the listed detection fields
+# (plus `annotated_image` at the top level when listed).
+FULL_DETECTION_FIELDS = {
+    'condition', 'accuracy', 'confidence', 'votes', 'bounding_box',
+    'affected_area', 'description', 'recommendations'
+}
+COMPACT_DETECTION_FIELDS = {
+    'condition', 'condition_id', 'accuracy', 'confidence', 'votes',
+    'bounding_box', 'affected_area'
+}
+# Only present on /api/analyze/sequence detections
+SEQUENCE_DETECTION_FIELDS = {'frames_seen', 'first_frame', 'last_frame'}
+TOP_LEVEL_OPTIONAL_FIELDS = {'annotated_image'}
+
+def parse_fields(raw, compact):
+    """Parse a comma separated `fields` value; returns None when not given"""
+    if not raw:
+        return None
+    fields = {f.strip() for f in raw.split(',') if f.strip()}
+    allowed = ((COMPACT_DETECTION_FIELDS if compact else FULL_DETECTION_FIELDS)
+               | SEQUENCE_DETECTION_FIELDS | TOP_LEVEL_OPTIONAL_FIELDS)
+    unknown = fields - allowed
+    if unknown:
+        raise ValueError(
+            f"Unknown fields: {', '.join(sorted(unknown))}. "
+            f"Valid fields: {', '.join(sorted(allowed))}"
+        )
+    return fields
+
+def format_detection(detection, compact=False, fields=None):
+    """Convert an ensemble detection to the API detection schema"""
+    condition = detection['class_name']
+    formatted = {
+        'condition': condition,
+        'accuracy': round(float(detection['score']) * 100, 1),
+        'confidence': get_confidence_level(detection['score']),
+        'votes': detection['votes'],
+        'bounding_box': detection['box'],
+        'affected_area': get_affected_area(detection['box'])
+    }
+    if compact:
+        formatted['condition_id'] = get_condition_entry(condition)['id']
+    else:
+        formatted['description'] = get_condition_description(condition)
+        formatted['recommendations'] = get_condition_recommendations(condition)
+    for key in SEQUENCE_DETECTION_FIELDS:
+        if key in detection:
+            formatted[key] = detection[key]
+
+    if fields is not None:
+        formatted = {k: v for k, v in formatted.items() if k in fields}
+    return formatted
+
+def _json_default(obj):
+    # numpy scalars and arrays coming out of the ensemble
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def encode_json(payload):
+    """
+    Serialize to UTF-8 bytes with orjson when available, falling back to compact
+    stdlib json. Bytes go straight into the response, so multi-MB base64 bodies
+    are not copied through str and back.
+    """
+    if orjson is not None:
+        return orjson.dumps(payload, default=_json_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(payload, separators=(',', ':'), default=_json_default).encode()
+
+def json_response(payload, status=200, headers=None):
+    return app.response_class(encode_json(payload), status=status, mimetype='application/json', headers=headers)
+
+def parse_analysis_request():
+    """Validate an analysis upload; returns (params, None) or (None, error response)"""
+    if 'file' not in request.files:
+        return None, (jsonify({'error': 'No file uploaded'}), 400)
+    
+    file = request.files['file']
+    if file.filename == '':
+        return None, (jsonify({'error': 'No file selected'}), 400)
+    
+    if not allowed_file(file.filename):
+        return None, (jsonify({'error': 'Invalid file type. Please upload PNG, JPG, or JPEG'}), 400)
+
+    tier = request.values.get('tier', DEFAULT_TIER)
+    if tier not in QUALITY_TIERS:
+        return None, (jsonify({'error': f"Invalid tier. Use one of: {', '.join(QUALITY_TIERS)}"}), 400)
+    
+    compact = request.values.get('mode', 'full') == 'compact'
     try:
-        if 'file' not in request.files:
-            return jsonify({'error': 'No file uploaded'}), 400
-        
-        file = request.files['file']
-        if file.filename == '':
-            return jsonify({'error': 'No file selected'}), 400
-        
-        if not allowed_file(file.filename):
-            return jsonify({'error': 'Invalid file type. Please upload PNG, JPG, or JPEG'}), 400
+        fields = parse_fields(request.values.get('fields'), compact)
+    except ValueError as e:
+        return None, (jsonify({'error': str(e)}), 400)
 
-        # Save uploaded file
-        filename = secure_filename(file.filename)
-        unique_id = uuid.uuid4().hex
-        unique_filename = f"{unique_id}_{filename}"
-        filepath = os.path.join(UPLOAD_FOLDER, unique_filename)
-        file.save(filepath)
-        
-        # Run ensemble analysis
-        print(f"🔍 Analyzing: {filename}")
-        result = ensemble_model.analyze_image(filepath)
-        
+    return {'file': file, 'tier': tier, 'compact': compact, 'fields': fields}, None
+
+def store_upload(data, filename):
+    """Store uploaded bytes (identical uploads share one stored copy); returns (id, filename, path)"""
+    filename = secure_filename(filename)
+    unique_id = uuid.uuid4().hex
+    ext = os.path.splitext(filename)[1]
+    _, filepath = upload_store.put_bytes(data, ext)
+    return unique_id, filename, filepath
+
+def save_upload(file):
+    return store_upload(file.read(), file.filename)
+
+def request_decode_bytes(filepath, tier=DEFAULT_TIER):
+    """Decoded bytes an analysis of this image needs; raises ImageTooLarge"""
+    # Every working member of the tier decodes the image, plus one copy for the annotation
+    preset = QUALITY_TIERS.get(tier) or {}
+    names = preset.get('members')
+    working = sum(1 for name, m in getattr(ensemble_model, 'models', {}).items()
+                  if m is not None and (names is None or name in names))
+    copies = max(1, working) + (1 if preset.get('annotate', True) else 0)
+    return estimate_decoded_bytes(filepath, copies=copies)
+
+def estimate_request_memory(filepath, tier=DEFAULT_TIER):
+    """Estimate decoded bytes for a request; returns (bytes, None) or (None, error response)"""
+    try:
+        return request_decode_bytes(filepath, tier), None
+    except ImageTooLarge as e:
+        return None, (jsonify({'error': str(e)}), 413)
+    except Exception as e:
+        return None, (jsonify({'error': f'Could not read image: {str(e)}'}), 400)
+
+def build_analysis_response(result, unique_id, tier, compact=False, fields=None):
+    """Prepare the React-facing response from an ensemble result"""
+    response = {
+        'status': 'success',
+        'analysis_id': unique_id,
+        'tier': result.get('tier', tier),
+        'detections': [],
+        'ensemble_stats': {
+            'total_models': result.get('total_models', 0),
+            'working_models': result.get('working_models', 0),
+            'total_detections': result.get('total_detections', 0)
+        }
+    }
+    
+    if compact:
+        response['catalog_version'] = CATALOG_VERSION
+    
+    # Include the annotated image in the response (FIXED: using 'annotated_image' not 'annotated_image_path')
+    if fields is not None and 'annotated_image' not in fields:
+        print("ℹ️ Annotated image omitted by field selection")
+    elif result.get('annotated_image'):
+        response['annotated_image'] = result['annotated_image']
+        print("✅ Annotated image included in response")
+    else:
+        print("⚠️ No annotated image available in result")
+    
+    # Add detections
+    for detection in result.get('detections', []):
+        response['detections'].append(format_detection(detection, compact, fields))
+    
+    if 'frames_analyzed' in result:
+        response['sequence'] = {
+            'frames_sampled': result.get('frames_sampled', 0),
+            'frames_analyzed': result['frames_analyzed'],
+            'frames_skipped': result.get('frames_skipped', 0)
+        }
+    
+    return response
+
+def run_analysis(filepath, unique_id, tier, compact, fields, estimated_bytes):
+    """Analyze a stored upload within the decode budget; returns the response dict"""
+    tracker = MemoryTracker()
+    with tracker, decode_budget.reserve(estimated_bytes):
+        if batcher is not None:
+            result = batcher.submit(filepath, tier=tier)
+        else:
+            result = ensemble_model.analyze_image(filepath, tier=tier)
+    
         # DEBUG: Print what we're getting from the ensemble
         print(f"📊 Raw result from ensemble:")
         print(f"   - Detections: {len(result.get('detections', []))}")
@@ -217,56 +465,237 @@ def analyze_skin():
             for i, det in enumerate(result['detections']):
                 print(f"   - Detection {i+1}: {det['class_name']} (score: {det['score']:.3f}, votes: {det['votes']})")
                 print(f"     Box coordinates: {det['box']}")
-        
+    
         # Prepare response for React frontend
-        response = {
-            'status': 'success',
-            'analysis_id': unique_id,
-            'detections': [],
-            'ensemble_stats': {
-                'total_models': result.get('total_models', 0),
-                'working_models': result.get('working_models', 0),
-                'total_detections': result.get('total_detections', 0)
-            }
-        }
+        response = build_analysis_response(result, unique_id, tier, compact, fields)
+        del result
+    
+    # Process-wide RSS is reported through /api/health, not to clients
+    memory_stats.record(tracker)
+    
+    print(f"✅ Analysis complete: {len(response['detections'])} detections found")
+    return response
+
+@app.route('/api/analyze', methods=['POST'])
+def analyze_skin():
+    if ensemble_model is None:
+        return jsonify({'error': 'AI models are not loaded. Please check the server logs.'}), 500
         
-        # Include the annotated image in the response (FIXED: using 'annotated_image' not 'annotated_image_path')
-        if result.get('annotated_image'):
-            response['annotated_image'] = result['annotated_image']
-            print("✅ Annotated image included in response")
-        else:
-            print("⚠️ No annotated image available in result")
+    try:
+        params, error = parse_analysis_request()
+        if error:
+            return error
+        tier = params['tier']
+
+        # Save uploaded file
+        unique_id, filename, filepath = save_upload(params['file'])
         
-        # Add detections
-        for detection in result.get('detections', []):
-            response['detections'].append({
-                'condition': detection['class_name'],
-                'accuracy': round(detection['score'] * 100, 1),
-                'confidence': get_confidence_level(detection['score']),
-                'votes': detection['votes'],
-                'bounding_box': detection['box'],
-                'affected_area': get_affected_area(detection['box']),
-                'description': get_condition_description(detection['class_name']),
-                'recommendations': get_condition_recommendations(detection['class_name'])
-            })
+        estimated_bytes, error = estimate_request_memory(filepath, tier)
+        if error:
+            return error
         
-        print(f"✅ Analysis complete: {len(response['detections'])} detections found")
-        return jsonify(response)
+        # Run ensemble analysis
+        print(f"🔍 Analyzing: {filename} (tier: {tier})")
+        response = run_analysis(filepath, unique_id, tier, params['compact'], params['fields'], estimated_bytes)
+        return json_response(response)
         
+    except MemoryBudgetExceeded as e:
+        print(f"⚠️ {str(e)}")
+        return jsonify({'error': 'Server is busy with other large images. Please retry shortly.'}), 503
+    except ValueError as e:
+        # Unreadable image data, rejected for this request only
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         print(f"❌ Analysis error: {str(e)}")
         import traceback
         traceback.print_exc()
         return jsonify({'error': f'Analysis failed: {str(e)}'}), 500
 
-@app.route('/api/health', methods=['GET'])
-def health_check():
+def sse_event(event, payload):
+    """Format one Server-Sent Event"""
+    return b"event: " + event.encode() + b"\ndata: " + encode_json(payload) + b"\n\n"
+
+def stream_analysis_events(filepath, unique_id, tier, compact, fields, estimated_bytes):
+    """Translate ensemble progress events into SSE messages"""
+    tracker = MemoryTracker()
+    try:
+        with tracker, decode_budget.reserve(estimated_bytes):
+            yield from _analysis_events(filepath, unique_id, tier, compact, fields)
+        memory_stats.record(tracker)
+    except MemoryBudgetExceeded as e:
+        print(f"⚠️ {str(e)}")
+        yield sse_event('error', {'error': 'Server is busy with other large images. Please retry shortly.'})
+    except Exception as e:
+        print(f"❌ Streaming analysis error: {str(e)}")
+        yield sse_event('error', {'error': f'Analysis failed: {str(e)}'})
+
+def _analysis_events(filepath, unique_id, tier, compact, fields):
+    """Ensemble progress events as SSE messages"""
+    for event, payload in ensemble_model.iter_analysis(filepath, tier=tier):
+        if event == 'member':
+            yield sse_event('member', {
+                'analysis_id': unique_id,
+                'member': payload['member'],
+                'seconds': round(payload['seconds'], 3),
+                'members_done': payload['members_done'],
+                'members_total': payload['members_total'],
+                'detections': [{
+                    'condition': d['class_name'],
+                    'score': round(float(d['score']), 4),
+                    'bounding_box': d['box']
+                } for d in payload['detections']]
+            })
+        elif event == 'provisional':
+            yield sse_event('provisional', {
+                'analysis_id': unique_id,
+                'members_done': payload['members_done'],
+                'members_total': payload['members_total'],
+                'detections': [format_detection(d, compact, fields) for d in payload['detections']]
+            })
+        elif event == 'final':
+            # The annotated image follows in its own event
+            final = dict(payload, annotated_image=None)
+            yield sse_event('final', build_analysis_response(final, unique_id, tier, compact, fields))
+        elif event == 'annotated':
+            if fields is None or 'annotated_image' in fields:
+                yield sse_event('annotated', {
+                    'analysis_id': unique_id,
+                    'annotated_image': payload['annotated_image']
+                })
+
+@app.route('/api/analyze/stream', methods=['POST'])
+def analyze_skin_stream():
+    if ensemble_model is None:
+        return jsonify({'error': 'AI models are not loaded. Please check the server logs.'}), 500
+    
+    params, error = parse_analysis_request()
+    if error:
+        return error
+    
+    unique_id, filename, filepath = save_upload(params['file'])
+    estimated_bytes, error = estimate_request_memory(filepath, params['tier'])
+    if error:
+        return error
+    print(f"🔍 Streaming analysis: {filename} (tier: {params['tier']})")
+    
+    events = stream_analysis_events(filepath, unique_id, params['tier'], params['compact'],
+                                    params['fields'], estimated_bytes)
+    return Response(stream_with_context(events), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+def sequence_decode_bytes(source):
+    """Decoded bytes a sequence analysis needs; raises ImageTooLarge"""
+    # One batch of frames plus the kept key frame are decoded at a time
+    return estimate_sequence_bytes(source, SEQUENCE_BATCH_SIZE + 1)
+
+def run_sequence_analysis(source, unique_id, tier, compact, fields, estimated_bytes):
+    """Analyze a stored video or burst within the decode budget; returns the response dict"""
+    tracker = MemoryTracker()
+    with tracker, decode_budget.reserve(estimated_bytes):
+        result = ensemble_model.analyze_sequence(source, tier=tier)
+        response = build_analysis_response(result, unique_id, tier, compact, fields)
+        del result
+    
+    memory_stats.record(tracker)
+    
+    print(f"✅ Sequence analysis complete: {len(response['detections'])} lesions "
+          f"({response['sequence']['frames_analyzed']} of {response['sequence']['frames_sampled']} frames analyzed)")
+    return response
+
+@app.route('/api/analyze/sequence', methods=['POST'])
+def analyze_skin_sequence():
+    """Analyze a video (`file`) or a photo burst (several `files`), one result per lesion"""
+    if ensemble_model is None or not hasattr(ensemble_model, 'analyze_sequence'):
+        return jsonify({'error': 'Sequence analysis is not available. Please check the server logs.'}), 500
+    
+    try:
+        tier = request.values.get('tier', DEFAULT_TIER)
+        if tier not in QUALITY_TIERS:
+            return jsonify({'error': f"Invalid tier. Use one of: {', '.join(QUALITY_TIERS)}"}), 400
+        compact = request.values.get('mode', 'full') == 'compact'
+        try:
+            fields = parse_fields(request.values.get('fields'), compact)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        video = request.files.get('file')
+        burst = [f for f in request.files.getlist('files') if f.filename]
+        if video is not None and video.filename:
+            if not allowed_video(video.filename):
+                return jsonify({'error': f"Invalid video type. Please upload {', '.join(sorted(VIDEO_EXTENSIONS)).upper()}"}), 400
+            unique_id, filename, source = save_upload(video)
+        elif burst:
+            if len(burst) > SEQUENCE_MAX_FILES:
+                return jsonify({'error': f'Too many images. Upload at most {SEQUENCE_MAX_FILES}'}), 400
+            if not all(allowed_file(f.filename) for f in burst):
+                return jsonify({'error': 'Invalid file type. Please upload PNG, JPG, or JPEG'}), 400
+            source = []
+            for f in burst:
+                unique_id, filename, filepath = save_upload(f)
+                source.append(filepath)
+            unique_id = uuid.uuid4().hex
+            filename = f"{len(source)} images"
+        else:
+            return jsonify({'error': "Upload a video as 'file' or images as 'files'"}), 400
+        
+        try:
+            estimated_bytes = sequence_decode_bytes(source)
+        except ImageTooLarge as e:
+            return jsonify({'error': str(e)}), 413
+        except Exception as e:
+            return jsonify({'error': f'Could not read upload: {str(e)}'}), 400
+        
+        print(f"🎞️ Analyzing sequence: {filename} (tier: {tier})")
+        response = run_sequence_analysis(source, unique_id, tier, compact, fields, estimated_bytes)
+        return json_response(response)
+        
+    except MemoryBudgetExceeded as e:
+        print(f"⚠️ {str(e)}")
+        return jsonify({'error': 'Server is busy with other large images. Please retry shortly.'}), 503
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"❌ Sequence analysis error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': f'Analysis failed: {str(e)}'}), 500
+
+@app.route('/api/conditions', methods=['GET'])
+def list_conditions():
+    headers = {
+        'ETag': f'"{CATALOG_ETAG}"',
+        'Cache-Control': 'public, max-age=86400'
+    }
+    if CATALOG_ETAG in request.if_none_match:
+        return app.response_class(status=304, headers=headers)
+    return json_response(CATALOG_PAYLOAD, headers=headers)
+
+def health_payload():
     models_loaded = ensemble_model is not None
-    return jsonify({
+    return {
         'status': 'healthy', 
         'models_loaded': models_loaded,
-        'environment': 'production' if os.path.exists('/tmp') else 'development'
-    })
+        'tiers': list(QUALITY_TIERS),
+        'model_loads': getattr(ensemble_model, 'load_report', {}),
+        'batching': batcher.stats() if batcher is not None else None,
+        'memory': {
+            'decode_budget': decode_budget.stats(),
+            'requests': memory_stats.stats()
+        },
+        'environment': 'production' if os.path.exists('/tmp') else 'development',
+        'storage': {
+            'uploads': upload_store.stats(),
+            'results': results_store.stats()
+        }
+    }
+
+@app.route('/api/health', methods=['GET'])
+def health_check():
+    return jsonify(health_payload())
+
+API_ENDPOINTS = ['/api/analyze', '/api/analyze/stream', '/api/analyze/sequence', '/api/conditions', '/api/health']
 
 # Root endpoint for Vercel
 @app.route('/')
@@ -274,7 +703,7 @@ def home():
     return jsonify({
         'message': 'Skin Disease Detection API',
         'version': '1.0.0',
-        'endpoints': ['/api/analyze', '/api/health']
+        'endpoints': API_ENDPOINTS
     })
 
 if __name__ == '__main__':
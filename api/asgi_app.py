@@ -0,0 +1,355 @@
+"""
+Async (ASGI) entry point serving the same routes and JSON as api/app.py
+(listed in API_ENDPOINTS).
+
+Uploads are received on the event loop, so slow clients only hold a
+coroutine while their body trickles in. Ensemble work runs on a dedicated
+inference executor, and file I/O and JSON encoding use the default thread
+pool, so neither can take inference threads away.
+
+    uvicorn asgi_app:app --app-dir api --port 5001
+"""
+
+import os
+import sys
+import uuid
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route
+from werkzeug.http import parse_etags
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Models, stores, budgets and the micro-batcher are shared with the Flask app
+from app import (
+    ensemble_model, QUALITY_TIERS, DEFAULT_TIER, BATCH_MAX_SIZE,
+    CATALOG_PAYLOAD, CATALOG_ETAG, ImageTooLarge, MemoryBudgetExceeded,
+    VIDEO_EXTENSIONS, SEQUENCE_MAX_FILES, API_ENDPOINTS,
+    allowed_file, allowed_video, parse_fields, store_upload, request_decode_bytes,
+    run_analysis, stream_analysis_events, sequence_decode_bytes, run_sequence_analysis,
+    health_payload, encode_json
+)
+
+# ---------------- CONFIG ----------------
+# Enough inference threads to fill one micro-batch
+INFERENCE_WORKERS = max(1, BATCH_MAX_SIZE)
+MAX_UPLOAD_BYTES = 32 * 1024 * 1024
+SEQUENCE_MAX_UPLOAD_BYTES = 256 * 1024 * 1024   # videos and bursts
+
+inference_executor = ThreadPoolExecutor(max_workers=INFERENCE_WORKERS, thread_name_prefix="inference")
+
+
+def run_inference(func, *args):
+    """Run blocking ensemble work on the inference executor"""
+    return asyncio.get_running_loop().run_in_executor(inference_executor, func, *args)
+
+
+async def json_response(payload, status=200, headers=None):
+    # Large base64 payloads are encoded off the event loop
+    body = await run_in_threadpool(encode_json, payload)
+    return Response(body, status_code=status, media_type='application/json', headers=headers)
+
+
+def error_response(message, status):
+    return Response(encode_json({'error': message}), status_code=status, media_type='application/json')
+
+
+class UploadTooLarge(Exception):
+    """Raised while receiving a body larger than MAX_UPLOAD_BYTES"""
+
+
+def limit_body(request, max_bytes):
+    """A request whose body raises UploadTooLarge once more than max_bytes have arrived"""
+    received = 0
+
+    async def receive():
+        nonlocal received
+        message = await request.receive()
+        if message['type'] == 'http.request':
+            # Counted as chunks arrive, so chunked uploads without a Content-Length are capped too
+            received += len(message.get('body', b''))
+            if received > max_bytes:
+                raise UploadTooLarge()
+        return message
+
+    return Request(request.scope, receive)
+
+
+async def read_form(request, max_bytes):
+    """Parse a multipart body within max_bytes; returns (form, values, None) or (None, None, error)"""
+    too_large = error_response(f'Upload is larger than {max_bytes // (1024 * 1024)} MB', 413)
+    content_length = request.headers.get('content-length')
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+        return None, None, too_large
+
+    # The multipart body is parsed as it arrives
+    try:
+        form = await limit_body(request, max_bytes).form()
+    except UploadTooLarge:
+        return None, None, too_large
+    values = dict(request.query_params)
+    values.update({k: v for k, v in form.items() if isinstance(v, str)})
+    return form, values, None
+
+
+def parse_options(values):
+    """Validate tier / mode / fields; returns ((tier, compact, fields), None) or (None, error)"""
+    tier = values.get('tier', DEFAULT_TIER)
+    if tier not in QUALITY_TIERS:
+        return None, error_response(f"Invalid tier. Use one of: {', '.join(QUALITY_TIERS)}", 400)
+
+    compact = values.get('mode', 'full') == 'compact'
+    try:
+        fields = parse_fields(values.get('fields'), compact)
+    except ValueError as e:
+        return None, error_response(str(e), 400)
+    return (tier, compact, fields), None
+
+
+def is_upload(value):
+    return value is not None and not isinstance(value, str) and value.filename != ''
+
+
+async def read_upload(upload):
+    data = await upload.read()
+    await upload.close()
+    return data
+
+
+async def parse_analysis_request(request):
+    """Read and validate an analysis upload; returns (params, None) or (None, error response)"""
+    form, values, error = await read_form(request, MAX_UPLOAD_BYTES)
+    if error:
+        return None, error
+
+    file = form.get('file')
+    if file is None or isinstance(file, str):
+        return None, error_response('No file uploaded', 400)
+    if file.filename == '':
+        return None, error_response('No file selected', 400)
+    if not allowed_file(file.filename):
+        return None, error_response('Invalid file type. Please upload PNG, JPG, or JPEG', 400)
+
+    options, error = parse_options(values)
+    if error:
+        return None, error
+    tier, compact, fields = options
+
+    data = await read_upload(file)
+    return {'data': data, 'filename': file.filename, 'tier': tier, 'compact': compact, 'fields': fields}, None
+
+
+async def prepare_upload(params):
+    """Store the upload and size its decode; returns ((id, filename, path, bytes), None) or (None, error)"""
+    unique_id, filename, filepath = await run_in_threadpool(store_upload, params['data'], params['filename'])
+    try:
+        estimated_bytes = await run_in_threadpool(request_decode_bytes, filepath, params['tier'])
+    except ImageTooLarge as e:
+        return None, error_response(str(e), 413)
+    except Exception as e:
+        return None, error_response(f'Could not read image: {str(e)}', 400)
+    return (unique_id, filename, filepath, estimated_bytes), None
+
+
+# ---------------- ROUTES ----------------
+async def analyze_skin(request):
+    if ensemble_model is None:
+        return error_response('AI models are not loaded. Please check the server logs.', 500)
+
+    try:
+        params, error = await parse_analysis_request(request)
+        if error:
+            return error
+        upload, error = await prepare_upload(params)
+        if error:
+            return error
+        unique_id, filename, filepath, estimated_bytes = upload
+
+        print(f"🔍 Analyzing: {filename} (tier: {params['tier']})")
+        response = await run_inference(run_analysis, filepath, unique_id, params['tier'],
+                                       params['compact'], params['fields'], estimated_bytes)
+        return await json_response(response)
+
+    except MemoryBudgetExceeded as e:
+        print(f"⚠️ {str(e)}")
+        return error_response('Server is busy with other large images. Please retry shortly.', 503)
+    except ValueError as e:
+        return error_response(str(e), 400)
+    except Exception as e:
+        print(f"❌ Analysis error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return error_response(f'Analysis failed: {str(e)}', 500)
+
+
+async def relay_events(events):
+    """Drive a blocking SSE generator on the inference executor and relay its messages"""
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    done = object()
+    cancelled = threading.Event()
+
+    def produce():
+        try:
+            for message in events:
+                if cancelled.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, message)
+        finally:
+            # Closing the generator skips the remaining work and releases its decode reservation
+            events.close()
+            loop.call_soon_threadsafe(queue.put_nowait, done)
+
+    producer = loop.run_in_executor(inference_executor, produce)
+    try:
+        while True:
+            message = await queue.get()
+            if message is done:
+                break
+            yield message
+        await producer
+    finally:
+        # Client went away - stop at the next ensemble event
+        cancelled.set()
+
+
+async def analyze_skin_stream(request):
+    if ensemble_model is None:
+        return error_response('AI models are not loaded. Please check the server logs.', 500)
+
+    params, error = await parse_analysis_request(request)
+    if error:
+        return error
+    upload, error = await prepare_upload(params)
+    if error:
+        return error
+    unique_id, filename, filepath, estimated_bytes = upload
+    print(f"🔍 Streaming analysis: {filename} (tier: {params['tier']})")
+
+    events = stream_analysis_events(filepath, unique_id, params['tier'], params['compact'],
+                                    params['fields'], estimated_bytes)
+    return StreamingResponse(relay_events(events), media_type='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+
+async def analyze_skin_sequence(request):
+    """Analyze a video (`file`) or a photo burst (several `files`), one result per lesion"""
+    if ensemble_model is None or not hasattr(ensemble_model, 'analyze_sequence'):
+        return error_response('Sequence analysis is not available. Please check the server logs.', 500)
+
+    try:
+        form, values, error = await read_form(request, SEQUENCE_MAX_UPLOAD_BYTES)
+        if error:
+            return error
+        options, error = parse_options(values)
+        if error:
+            return error
+        tier, compact, fields = options
+
+        video = form.get('file')
+        burst = [f for f in form.getlist('files') if is_upload(f)]
+        if is_upload(video):
+            if not allowed_video(video.filename):
+                return error_response(
+                    f"Invalid video type. Please upload {', '.join(sorted(VIDEO_EXTENSIONS)).upper()}", 400)
+            data = await read_upload(video)
+            unique_id, filename, source = await run_in_threadpool(store_upload, data, video.filename)
+        elif burst:
+            if len(burst) > SEQUENCE_MAX_FILES:
+                return error_response(f'Too many images. Upload at most {SEQUENCE_MAX_FILES}', 400)
+            if not all(allowed_file(f.filename) for f in burst):
+                return error_response('Invalid file type. Please upload PNG, JPG, or JPEG', 400)
+            source = []
+            for f in burst:
+                data = await read_upload(f)
+                _, _, filepath = await run_in_threadpool(store_upload, data, f.filename)
+                source.append(filepath)
+            unique_id = uuid.uuid4().hex
+            filename = f"{len(source)} images"
+        else:
+            return error_response("Upload a video as 'file' or images as 'files'", 400)
+
+        try:
+            estimated_bytes = await run_in_threadpool(sequence_decode_bytes, source)
+        except ImageTooLarge as e:
+            return error_response(str(e), 413)
+        except Exception as e:
+            return error_response(f'Could not read upload: {str(e)}', 400)
+
+        print(f"🎞️ Analyzing sequence: {filename} (tier: {tier})")
+        response = await run_inference(run_sequence_analysis, source, unique_id, tier, compact, fields,
+                                       estimated_bytes)
+        return await json_response(response)
+
+    except MemoryBudgetExceeded as e:
+        print(f"⚠️ {str(e)}")
+        return error_response('Server is busy with other large images. Please retry shortly.', 503)
+    except ValueError as e:
+        return error_response(str(e), 400)
+    except Exception as e:
+        print(f"❌ Sequence analysis error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return error_response(f'Analysis failed: {str(e)}', 500)
+
+
+async def list_conditions(request):
+    headers = {
+        'ETag': f'"{CATALOG_ETAG}"',
+        'Cache-Control': 'public, max-age=86400'
+    }
+    # Parsed like Flask's request.if_none_match, so '*' and ETag lists match too
+    if CATALOG_ETAG in parse_etags(request.headers.get('if-none-match')):
+        return Response(status_code=304, headers=headers)
+    return await json_response(CATALOG_PAYLOAD, headers=headers)
+
+
+async def health_check(request):
+    payload = health_payload()
+    payload['server'] = {'mode': 'asgi', 'inference_workers': INFERENCE_WORKERS}
+    return await json_response(payload)
+
+
+async def home(request):
+    return await json_response({
+        'message': 'Skin Disease Detection API',
+        'version': '1.0.0',
+        'endpoints': API_ENDPOINTS
+    })
+
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    inference_executor.shutdown(wait=False)
+
+
+app = Starlette(
+    routes=[
+        Route('/api/analyze', analyze_skin, methods=['POST']),
+        Route('/api/analyze/stream', analyze_skin_stream, methods=['POST']),
+        Route('/api/analyze/sequence', analyze_skin_sequence, methods=['POST']),
+        Route('/api/conditions', list_conditions, methods=['GET']),
+        Route('/api/health', health_check, methods=['GET']),
+        Route('/', home),
+    ],
+    middleware=[Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])],
+    lifespan=lifespan
+)
+
+if __name__ == '__main__':
+    import uvicorn
+
+    print(f"🚀 Starting ASGI server ({INFERENCE_WORKERS} inference workers)...")
+    uvicorn.run(app, port=5001, host='0.0.0.0')
@@ -0,0 +1,126 @@
+"""
+Cross-request dynamic micro-batching for the ensemble.
+
+Concurrent single-image requests are collected for up to ``max_wait_ms`` or
+until ``max_batch_size`` images are waiting, then analyzed with one batched
+forward pass per member. Each caller decodes its own image before queueing,
+so an unreadable upload fails only that request, and blocks only for its own
+result. The annotated image is rendered in the caller's thread so drawing
+does not hold up the next batch.
+"""
+
+import queue
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future
+
+# ---------------- CONFIG ----------------
+DEFAULT_MAX_BATCH_SIZE = 8
+DEFAULT_MAX_WAIT_MS = 10
+
+
+class MicroBatcher:
+    def __init__(self, ensemble, max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait_ms=DEFAULT_MAX_WAIT_MS):
+        self.ensemble = ensemble
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._queue = queue.Queue()
+        self._stopped = threading.Event()
+        self._stats_lock = threading.Lock()
+        self.batches = 0
+        self.requests = 0
+        self.largest_batch = 0
+
+        self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, image_path, tier=None, timeout=None):
+        """Queue one image and block until its result is ready"""
+        if self._stopped.is_set():
+            raise RuntimeError("MicroBatcher has been closed")
+
+        # Raises ValueError for this request alone when the image is unreadable
+        image = self.ensemble.decode_image(image_path)
+        future = Future()
+        self._queue.put((image_path, image, tier, future))
+        result = future.result(timeout=timeout)
+        return self.ensemble.attach_annotation(image_path, result)
+
+    def close(self):
+        self._stopped.set()
+        self._queue.put(None)
+
+    # ---------------- WORKER ----------------
+    def _collect(self, first):
+        """Gather requests until the batch is full or the wait window closes"""
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)  # let the main loop see the stop marker
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch = self._collect(first)
+
+            # Requests for different tiers cannot share a forward pass
+            by_tier = defaultdict(list)
+            for item in batch:
+                by_tier[item[2]].append(item)
+
+            for tier, items in by_tier.items():
+                futures = [future for _, _, _, future in items]
+                try:
+                    results = self.ensemble.analyze_batch(
+                        [image_path for image_path, _, _, _ in items], tier=tier, annotate=False,
+                        images=[image for _, image, _, _ in items]
+                    )
+                    if len(results) != len(items):
+                        raise RuntimeError(f"Batch returned {len(results)} results for {len(items)} images")
+                    for future, result in zip(futures, results):
+                        future.set_result(result)
+                except Exception as e:
+                    for future in futures:
+                        if not future.done():
+                            future.set_exception(e)
+
+            with self._stats_lock:
+                self.batches += 1
+                self.requests += len(batch)
+                self.largest_batch = max(self.largest_batch, len(batch))
+
+        # Fail anything still waiting after close()
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                item[3].set_exception(RuntimeError("MicroBatcher has been closed"))
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': round(self.max_wait * 1000, 3),
+                'batches': self.batches,
+                'requests': self.requests,
+                'mean_batch_size': round(self.requests / self.batches, 2) if self.batches else 0.0,
+                'largest_batch': self.largest_batch,
+                'queued': self._queue.qsize()
+            }
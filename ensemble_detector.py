@@ -6,22 +6,130 @@ import os
 import numpy as np
 from ultralytics import YOLO
 import torch
-from PIL import Image, ImageDraw, ImageFont
+from ensemble_members import load_member_config, load_members
+from preprocess_cache import unletterbox_box
+from PIL import Image, ImageDraw, ImageFont, ImageOps
+import cv2
 from collections import Counter
 import base64
 import io
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# ---------------- QUALITY TIERS ----------------
+# members:     which ensemble members run (None = every loaded member)
+# imgsz:       inference size passed to predict (None = model default)
+# conf:        prediction confidence threshold
+# annotate:    render the annotated image
+# min_votes:   distinct members needed per detection (None = half the working members)
+QUALITY_TIERS = {
+    'fast': {
+        'members': ['YOLOv8'],
+        'imgsz': 320,
+        'conf': 0.3,
+        'annotate': False,
+        'min_votes': 1
+    },
+    'balanced': {
+        'members': None,
+        'imgsz': 640,
+        'conf': 0.2,
+        'annotate': True,
+        'min_votes': None
+    },
+    'accurate': {
+        'members': None,
+        'imgsz': 960,
+        'conf': 0.1,
+        'annotate': True,
+        'min_votes': 2
+    }
+}
+DEFAULT_TIER = 'balanced'
+
+# ---------------- SEQUENCES ----------------
+SEQUENCE_SAMPLE_FPS = 5          # frames per second sampled from videos
+SEQUENCE_MAX_FRAMES = 300        # stop sampling after this many frames
+SEQUENCE_DIFF_THRESHOLD = 6      # dHash bits (of 64) below which a frame counts as redundant
+SEQUENCE_BATCH_SIZE = 8          # frames per batched member call
+TRACK_IOU_THRESH = 0.3           # IoU linking a detection to an existing lesion track
+
+def frame_hash(frame):
+    """64-bit difference hash of a BGR frame"""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int(np.packbits(bits).view('>u8')[0])
+
+def hash_distance(a, b):
+    return bin(a ^ b).count('1')
+
+def iter_sequence_frames(source, sample_fps=SEQUENCE_SAMPLE_FPS, max_frames=SEQUENCE_MAX_FRAMES,
+                         decode=None):
+    """
+    Yield (frame_index, BGR frame) sampled from a video path or a list of
+    image paths (a photo burst, where every image is a frame). Burst images
+    are read with `decode` (path -> BGR array, raising ValueError), so formats
+    OpenCV cannot read, such as GIF, still work.
+    """
+    if isinstance(source, (list, tuple)):
+        for i, path in enumerate(source[:max_frames]):
+            if decode is None:
+                frame = cv2.imread(path, cv2.IMREAD_COLOR)
+            else:
+                try:
+                    frame = decode(path)
+                except ValueError as e:
+                    print(f"⚠️ Skipping burst frame {i}: {e}")
+                    continue
+            if frame is not None:
+                yield i, frame
+        return
+    
+    capture = cv2.VideoCapture(source)
+    if not capture.isOpened():
+        raise ValueError(f"Could not open video: {source}")
+    try:
+        video_fps = capture.get(cv2.CAP_PROP_FPS) or sample_fps
+        stride = max(1, int(round(video_fps / sample_fps)))
+        index = 0
+        sampled = 0
+        while sampled < max_frames:
+            # grab() skips decoding frames that are not sampled
+            if not capture.grab():
+                break
+            if index % stride == 0:
+                ok, frame = capture.retrieve()
+                if ok:
+                    yield index, frame
+                    sampled += 1
+            index += 1
+    finally:
+        capture.release()
+
+def get_tier(name):
+    """Return the preset for a tier name, raising ValueError for unknown tiers"""
+    tier = QUALITY_TIERS.get(name or DEFAULT_TIER)
+    if tier is None:
+        raise ValueError(f"Unknown tier '{name}'. Valid tiers: {', '.join(QUALITY_TIERS)}")
+    return tier
 
 class SkinDiseaseEnsemble:
-    def __init__(self):
+    def __init__(self, results_store=None, base_dir=None, members_config=None):
         self.class_names = ["Acne", "Eczema", "Melasma", "Rosacea", "Shingles"]
         self.iou_thresh = 0.5
         
-        # HARDCODED CORRECT PATH
-        self.BASE_DIR = r"C:\Users\rapha\OneDrive\Desktop\Portfolio\skin-detection\skin-disease-detection"
+        # Paths are relative to this file unless a base directory is given
+        self.BASE_DIR = base_dir or os.path.dirname(os.path.abspath(__file__))
         self.WEIGHTS_DIR = os.path.join(self.BASE_DIR, 'weights')
         self.RESULTS_DIR = os.path.join(self.BASE_DIR, 'results-ensemble')
         
-        print(f"📁 Using hardcoded base directory: {self.BASE_DIR}")
+        # Optional file_storage.ContentStore; when set, annotated images are
+        # deduplicated by content instead of written to RESULTS_DIR
+        self.results_store = results_store
+        
+        print(f"📁 Base directory: {self.BASE_DIR}")
         print(f"📁 Weights directory: {self.WEIGHTS_DIR}")
         
         # Create results directory
@@ -36,82 +144,123 @@ class SkinDiseaseEnsemble:
         else:
             print(f"❌ Weights directory does not exist: {self.WEIGHTS_DIR}")
         
-        self.models = self._load_models()
+        self.members = {m['name']: m for m in load_member_config(members_config)}
+        self._check_tier_members()
+        self._member_locks = {name: threading.Lock() for name in self.members}
+        self.models, self.load_report = self._load_models()
         
+    def _check_tier_members(self):
+        """Fail at startup when a tier names members the member config does not define"""
+        for tier_name, preset in QUALITY_TIERS.items():
+            if preset['members'] is None:
+                continue
+            unknown = [name for name in preset['members'] if name not in self.members]
+            if unknown:
+                raise ValueError(
+                    f"Tier '{tier_name}' uses members missing from the member config: {', '.join(unknown)} "
+                    f"(configured: {', '.join(self.members)})"
+                )
+    
     def _load_models(self):
-        """Load all available models with absolute paths"""
-        models = {}
-        
-        # YOLOv8
-        yolov8_path = os.path.join(self.WEIGHTS_DIR, 'yolov8-best.pt')
-        print(f"🔍 Looking for YOLOv8 at: {yolov8_path}")
-        print(f"   File exists: {os.path.exists(yolov8_path)}")
-        
-        try:
-            if os.path.exists(yolov8_path):
-                models['YOLOv8'] = YOLO(yolov8_path)
-                print("✅ YOLOv8 loaded successfully")
-            else:
-                print(f"❌ YOLOv8 file not found: {yolov8_path}")
-                models['YOLOv8'] = None
-        except Exception as e:
-            print(f"❌ YOLOv8 failed to load: {e}")
-            models['YOLOv8'] = None
+        """Load all configured members in parallel; returns (models, load report)"""
+        loaders = {'ultralytics': YOLO}
+        return load_members(list(self.members.values()), self.WEIGHTS_DIR, loaders)
+    
+    def _parse_yolov8_result(self, r, source_name, class_map=None):
+        """Convert one ultralytics result into detection dicts"""
+        detections = []
+        if r.boxes is not None and len(r.boxes) > 0:
+            boxes = r.boxes.xyxy.cpu().numpy()
+            confs = r.boxes.conf.cpu().numpy()
+            cls_ids = r.boxes.cls.cpu().numpy().astype(int)
+            
+            for box, conf, cid in zip(boxes, confs, cls_ids):
+                # Translate the member's own class ids to ensemble classes
+                if class_map is not None:
+                    name = class_map.get(str(cid))
+                    if name not in self.class_names:
+                        continue
+                    cid = self.class_names.index(name)
+                if cid < len(self.class_names):
+                    detections.append({
+                        "box": box.tolist(),
+                        "score": float(conf),
+                        "class_id": int(cid),
+                        "class_name": self.class_names[cid],
+                        "source": source_name
+                    })
+        return detections
+    
+    def _run_yolov8_batch(self, model, sources, source_name, conf=0.2, imgsz=None, class_map=None):
+        """Run YOLOv8 inference over several images in one batched call"""
+        if model is None or not sources:
+            return [[] for _ in sources]
         
-        # YOLO-NAS placeholder
-        try:
-            if os.path.exists(yolov8_path):  # Use YOLOv8 as placeholder
-                models['YOLO-NAS'] = YOLO(yolov8_path)
-                print("✅ YOLO-NAS placeholder loaded")
-            else:
-                print("❌ YOLO-NAS placeholder not available (YOLOv8 not found)")
-                models['YOLO-NAS'] = None
-        except Exception as e:
-            print(f"❌ YOLO-NAS failed: {e}")
-            models['YOLO-NAS'] = None
+        predict_kwargs = {'imgsz': imgsz} if imgsz else {}
+        if len(sources) > 1:
+            predict_kwargs['batch'] = len(sources)
+            try:
+                results = model.predict(source=list(sources), conf=conf, verbose=False, **predict_kwargs)
+                # ultralytics reorders, expands or drops path sources (GIFs, unreadable
+                # files), so results are only trusted when they line up one to one
+                if len(results) == len(sources):
+                    return [self._parse_yolov8_result(r, source_name, class_map) for r in results]
+                print(f"⚠️ {source_name} returned {len(results)} results for {len(sources)} images, "
+                      f"running them one at a time")
+            except Exception as e:
+                print(f"⚠️ {source_name} batch failed ({e}), running images one at a time")
+            predict_kwargs.pop('batch')
         
-        # EfficientDet placeholder  
-        try:
-            if os.path.exists(yolov8_path):  # Use YOLOv8 as placeholder
-                models['EfficientDet'] = YOLO(yolov8_path)
-                print("✅ EfficientDet placeholder loaded")
-            else:
-                print("❌ EfficientDet placeholder not available (YOLOv8 not found)")
-                models['EfficientDet'] = None
-        except Exception as e:
-            print(f"❌ EfficientDet failed: {e}")
-            models['EfficientDet'] = None
-            
-        return models
+        # One image per call, so a bad image only empties its own result
+        detections = []
+        for source in sources:
+            try:
+                results = model.predict(source=source, conf=conf, verbose=False, **predict_kwargs)
+                detections.append(self._parse_yolov8_result(results[0], source_name, class_map) if results else [])
+            except Exception as e:
+                print(f"❌ {source_name} inference failed: {e}")
+                detections.append([])
+        return detections
     
-    def _run_yolov8_inference(self, model, image_path, source_name):
+    def _run_yolov8_inference(self, model, image_path, source_name, conf=0.2, imgsz=None, class_map=None):
         """Run YOLOv8 inference"""
-        if model is None:
-            return []
-        
-        try:
-            results = model.predict(source=image_path, conf=0.2, verbose=False)
-            detections = []
-            
-            for r in results:
-                if r.boxes is not None and len(r.boxes) > 0:
-                    boxes = r.boxes.xyxy.cpu().numpy()
-                    confs = r.boxes.conf.cpu().numpy()
-                    cls_ids = r.boxes.cls.cpu().numpy().astype(int)
-                    
-                    for box, conf, cid in zip(boxes, confs, cls_ids):
-                        if cid < len(self.class_names):
-                            detections.append({
-                                "box": box.tolist(),
-                                "score": float(conf),
-                                "class_id": int(cid),
-                                "class_name": self.class_names[cid],
-                                "source": source_name
-                            })
-            return detections
-        except Exception as e:
-            print(f"❌ {source_name} inference failed: {e}")
-            return []
+        batch = self._run_yolov8_batch(model, [image_path], source_name, conf, imgsz, class_map)
+        return batch[0] if batch else []
+    
+    def _run_member_batch(self, name, sources, conf=0.2, imgsz=None, metas=None):
+        """
+        Run one configured member, applying its confidence floor and class map.
+        `metas` are preprocess-cache entries when `sources` are letterboxed arrays;
+        boxes are then mapped back to original image coordinates.
+        """
+        member = self.members.get(name, {})
+        if member.get('conf') is not None:
+            conf = max(conf, member['conf'])
+        # ultralytics predictors are not thread-safe, so each member runs one call at a time
+        with self._member_locks[name]:
+            batch = self._run_yolov8_batch(self.models.get(name), sources, name,
+                                           conf=conf, imgsz=imgsz, class_map=member.get('class_map'))
+        if metas is not None:
+            for dets, meta in zip(batch, metas):
+                for d in dets:
+                    d["box"] = unletterbox_box(d["box"], meta)
+        return batch
+    
+    def _cached_sources(self, image_paths, preprocess_cache, imgsz):
+        """Letterboxed arrays (views into the cache) and their metadata, or (None, None)"""
+        if preprocess_cache is None:
+            return None, None
+        if imgsz and preprocess_cache.imgsz != imgsz:
+            print(f"⚠️ Preprocess cache is {preprocess_cache.imgsz}px but the tier runs at {imgsz}px, decoding instead")
+            return None, None
+        preprocess_cache.add(image_paths)
+        pairs = [preprocess_cache.get(p) for p in image_paths]
+        if any(array is None for array, _ in pairs):
+            return None, None
+        return [array for array, _ in pairs], [meta for _, meta in pairs]
+    
+    def _run_member(self, name, image_path, conf=0.2, imgsz=None):
+        return self._run_member_batch(name, [image_path], conf, imgsz)[0]
     
     def _iou(self, boxA, boxB):
         """Calculate Intersection over Union"""
@@ -130,10 +279,12 @@ class SkinDiseaseEnsemble:
         
         return inter / union if union > 0 else 0.0
     
-    def _cluster_and_vote(self, detections, min_votes=2):
+    def _cluster_and_vote(self, detections, min_votes=2, iou_thresh=None):
         """Fuse detections using IoU clustering + majority voting"""
         if len(detections) == 0:
             return []
+        
+        iou_thresh = self.iou_thresh if iou_thresh is None else iou_thresh
 
         dets = sorted(detections, key=lambda d: d["score"], reverse=True)
         used = [False] * len(dets)
@@ -147,7 +298,7 @@ class SkinDiseaseEnsemble:
             for j in range(i+1, len(dets)):
                 if used[j]:
                     continue
-                if self._iou(d["box"], dets[j]["box"]) >= self.iou_thresh:
+                if self._iou(d["box"], dets[j]["box"]) >= iou_thresh:
                     group_idxs.append(j)
                     used[j] = True
 
@@ -183,8 +334,14 @@ class SkinDiseaseEnsemble:
         return ensembles
     
     def _create_annotated_image(self, image_path, detections):
-        """Create annotated image with bounding boxes and labels"""
-        img = Image.open(image_path).convert("RGB")
+        """Create annotated image with bounding boxes and labels (image_path may be a PIL image)"""
+        if isinstance(image_path, Image.Image):
+            img = image_path.convert("RGB")
+        else:
+            # Close the source as soon as the RGB copy exists; EXIF rotation is
+            # applied so boxes land where cv2-decoded members saw them
+            with Image.open(image_path) as src:
+                img = ImageOps.exif_transpose(src).convert("RGB")
         draw = ImageDraw.Draw(img)
         
         try:
@@ -228,49 +385,308 @@ class SkinDiseaseEnsemble:
     
     def _image_to_base64(self, image):
         """Convert PIL image to base64 string"""
-        buffered = io.BytesIO()
-        image.save(buffered, format="JPEG", quality=85)
-        img_str = base64.b64encode(buffered.getvalue()).decode()
+        with io.BytesIO() as buffered:
+            image.save(buffered, format="JPEG", quality=85)
+            img_str = base64.b64encode(buffered.getvalue()).decode()
         return f"data:image/jpeg;base64,{img_str}"
     
-    def analyze_image(self, image_path):
-        """Main analysis function"""
-        # Run inference with all models
-        all_detections = []
+    def _select_members(self, tier):
+        """Members (name -> model) that run for a tier preset"""
+        names = tier['members'] if tier['members'] is not None else list(self.models)
+        return {name: self.models.get(name) for name in names if name in self.models}
+    
+    def _min_votes(self, preset, working_models):
+        """Vote threshold for a tier preset and number of working members"""
+        if preset['min_votes'] is None:
+            return max(1, (working_models // 2))
+        return max(1, min(preset['min_votes'], working_models))
+    
+    def _render_annotation(self, image_path, ensembles, base_name=None):
+        """Draw, save and base64-encode the annotated image"""
+        annotated_img = self._create_annotated_image(image_path, ensembles)
+        annotated_image_b64 = self._image_to_base64(annotated_img)
         
-        # YOLOv8
-        yolo_dets = self._run_yolov8_inference(self.models.get('YOLOv8'), image_path, "YOLOv8")
-        all_detections.extend(yolo_dets)
+        # Also save to file
+        if self.results_store is not None:
+            _, output_path = self.results_store.put_image(annotated_img, ".jpg", quality=95)
+        else:
+            base_name = base_name or os.path.splitext(os.path.basename(image_path))[0]
+            output_path = os.path.join(self.RESULTS_DIR, f"{base_name}_annotated.jpg")
+            annotated_img.save(output_path, quality=95)
+        print(f"💾 Saved annotated image to: {output_path}")
         
-        # YOLO-NAS placeholder
-        yolo_nas_dets = self._run_yolov8_inference(self.models.get('YOLO-NAS'), image_path, "YOLO-NAS")
-        all_detections.extend(yolo_nas_dets)
+        # Drop the full-resolution copy before the caller builds its response
+        annotated_img.close()
+        del annotated_img
+        return annotated_image_b64
+    
+    def _timed_member(self, name, image_path, conf, imgsz):
+        start = time.perf_counter()
+        dets = self._run_member(name, image_path, conf=conf, imgsz=imgsz)
+        return dets, time.perf_counter() - start
+    
+    def iter_analysis(self, image_path, tier=DEFAULT_TIER):
+        """
+        Run the analysis and yield (event, payload) as results become available:
+        'member' as each member finishes, 'provisional' fused results until the
+        last member is in, then 'final' and (when rendered) 'annotated'.
+        """
+        tier_name = tier or DEFAULT_TIER
+        preset = get_tier(tier_name)
+        members = self._select_members(preset)
+        runnable = [name for name, model in members.items() if model is not None]
         
-        # EfficientDet placeholder
-        effdet_dets = self._run_yolov8_inference(self.models.get('EfficientDet'), image_path, "EfficientDet")
-        all_detections.extend(effdet_dets)
+        # Ensemble fusion settings
+        working_models = len(runnable)
+        min_votes = self._min_votes(preset, working_models)
+        
+        # Run inference with the tier's members in parallel
+        all_detections = []
+        if runnable:
+            with ThreadPoolExecutor(max_workers=len(runnable), thread_name_prefix="member") as pool:
+                futures = {
+                    pool.submit(self._timed_member, name, image_path, preset['conf'], preset['imgsz']): name
+                    for name in runnable
+                }
+                for done, future in enumerate(as_completed(futures), start=1):
+                    dets, seconds = future.result()
+                    all_detections.extend(dets)
+                    yield 'member', {
+                        'member': futures[future],
+                        'detections': dets,
+                        'seconds': seconds,
+                        'members_done': done,
+                        'members_total': working_models
+                    }
+                    if done < working_models:
+                        yield 'provisional', {
+                            'detections': self._cluster_and_vote(all_detections, min_votes=min(min_votes, done)),
+                            'members_done': done,
+                            'members_total': working_models
+                        }
         
-        # Ensemble fusion
-        working_models = sum(1 for model in self.models.values() if model is not None)
-        min_votes = max(1, (working_models // 2))
         ensembles = self._cluster_and_vote(all_detections, min_votes=min_votes)
+        yield 'final', {
+            'detections': ensembles,
+            'total_detections': len(all_detections),
+            'total_models': len(self.models),
+            'working_models': working_models,
+            'annotated_image': None,
+            'tier': tier_name,
+            'members': list(members)
+        }
         
         # Create annotated image
+        if ensembles and preset['annotate']:
+            yield 'annotated', {'annotated_image': self._render_annotation(image_path, ensembles)}
+    
+    def analyze_image(self, image_path, tier=DEFAULT_TIER):
+        """Main analysis function"""
+        result = None
         annotated_image_b64 = None
-        if ensembles:
-            annotated_img = self._create_annotated_image(image_path, ensembles)
-            annotated_image_b64 = self._image_to_base64(annotated_img)
-            
-            # Also save to file
-            base_name = os.path.splitext(os.path.basename(image_path))[0]
-            output_path = os.path.join(self.RESULTS_DIR, f"{base_name}_annotated.jpg")
-            annotated_img.save(output_path, quality=95)
-            print(f"💾 Saved annotated image to: {output_path}")
+        for event, payload in self.iter_analysis(image_path, tier):
+            if event == 'final':
+                result = payload
+            elif event == 'annotated':
+                annotated_image_b64 = payload['annotated_image']
+        
+        result['annotated_image'] = annotated_image_b64
+        return result
+    
+    def attach_annotation(self, image_path, result):
+        """Render the annotated image for a result when its tier asks for one"""
+        preset = get_tier(result.get('tier'))
+        if result['detections'] and preset['annotate'] and not result.get('annotated_image'):
+            result['annotated_image'] = self._render_annotation(image_path, result['detections'])
+        return result
+    
+    def decode_image(self, image_path):
+        """
+        BGR array of an image (first frame of animated files); raises ValueError if unreadable.
+        EXIF orientation is applied, as cv2 does when ultralytics decodes a path.
+        """
+        try:
+            with Image.open(image_path) as src:
+                rgb = np.asarray(ImageOps.exif_transpose(src).convert("RGB"))
+        except Exception as e:
+            raise ValueError(f"Could not read image {os.path.basename(image_path)}: {e}")
+        return np.ascontiguousarray(rgb[:, :, ::-1])
+    
+    def analyze_batch(self, image_paths, tier=DEFAULT_TIER, annotate=True, preprocess_cache=None, images=None):
+        """
+        Analyze several images with one batched forward pass per member.
+        Members always get decoded arrays, so results line up with image_paths;
+        pass `images` (from decode_image) to skip decoding here. With a
+        preprocess_cache.PreprocessCache at the tier's inference size the
+        members read letterboxed arrays straight from its memory map.
+        """
+        tier_name = tier or DEFAULT_TIER
+        preset = get_tier(tier_name)
+        members = self._select_members(preset)
+        runnable = [name for name, model in members.items() if model is not None]
+        working_models = len(runnable)
+        min_votes = self._min_votes(preset, working_models)
+        
+        sources, metas = self._cached_sources(image_paths, preprocess_cache, preset['imgsz'])
+        if sources is None:
+            sources = images if images is not None else [self.decode_image(p) for p in image_paths]
+        imgsz = preprocess_cache.imgsz if metas is not None else preset['imgsz']
+        
+        # per_member[name][i] = detections for image i
+        per_member = {}
+        if runnable:
+            with ThreadPoolExecutor(max_workers=len(runnable), thread_name_prefix="member") as pool:
+                futures = {
+                    pool.submit(self._run_member_batch, name, sources, preset['conf'], imgsz, metas): name
+                    for name in runnable
+                }
+                for future in as_completed(futures):
+                    per_member[futures[future]] = future.result()
+        
+        results = []
+        for i, image_path in enumerate(image_paths):
+            all_detections = [d for name in runnable for d in per_member[name][i]]
+            result = {
+                'detections': self._cluster_and_vote(all_detections, min_votes=min_votes),
+                'total_detections': len(all_detections),
+                'total_models': len(self.models),
+                'working_models': working_models,
+                'annotated_image': None,
+                'tier': tier_name,
+                'members': list(members)
+            }
+            if annotate:
+                self.attach_annotation(image_path, result)
+            results.append(result)
+        return results
+    
+    def _track_lesions(self, frame_results):
+        """Link per-frame fused detections into lesion tracks across frames"""
+        tracks = []
+        for frame_index, detections in frame_results:
+            claimed = set()
+            for det in sorted(detections, key=lambda d: d['score'], reverse=True):
+                best, best_iou = None, TRACK_IOU_THRESH
+                for t, track in enumerate(tracks):
+                    if t in claimed:
+                        continue
+                    overlap = self._iou(det['box'], track['last_box'])
+                    if overlap >= best_iou:
+                        best, best_iou = t, overlap
+                if best is None:
+                    tracks.append({'observations': [], 'last_box': det['box']})
+                    best = len(tracks) - 1
+                claimed.add(best)
+                tracks[best]['observations'].append((frame_index, det))
+                tracks[best]['last_box'] = det['box']
+        
+        lesions = []
+        for track in tracks:
+            observations = track['observations']
+            # Score-weighted class vote across the frames the lesion was seen in
+            class_weight = Counter()
+            for _, det in observations:
+                class_weight[det['class_id']] += det['score']
+            best_class = max(class_weight, key=class_weight.get)
+            class_scores = [float(det['score']) for _, det in observations if det['class_id'] == best_class]
+            _, best_det = max(observations, key=lambda o: o[1]['score'])
+            lesions.append({
+                'box': best_det['box'],
+                'score': float(np.mean(class_scores)),
+                'max_score': max(class_scores),
+                'class_id': best_class,
+                'class_name': self.class_names[best_class],
+                'votes': max(det['votes'] for _, det in observations),
+                'frames_seen': len(observations),
+                'first_frame': observations[0][0],
+                'last_frame': observations[-1][0]
+            })
+        return sorted(lesions, key=lambda l: (l['frames_seen'], l['score']), reverse=True)
+    
+    def analyze_sequence(self, source, tier=DEFAULT_TIER, sample_fps=SEQUENCE_SAMPLE_FPS,
+                         max_frames=SEQUENCE_MAX_FRAMES, diff_threshold=SEQUENCE_DIFF_THRESHOLD,
+                         batch_size=SEQUENCE_BATCH_SIZE, min_votes=None):
+        """
+        Analyze a video path or a burst (list of image paths). Near-identical
+        frames are skipped, the rest are batched through the members, and
+        detections are tracked so each lesion is reported once. `min_votes`
+        overrides the tier's vote threshold.
+        """
+        tier_name = tier or DEFAULT_TIER
+        preset = get_tier(tier_name)
+        members = self._select_members(preset)
+        runnable = [name for name, model in members.items() if model is not None]
+        working_models = len(runnable)
+        if min_votes is None:
+            min_votes = self._min_votes(preset, working_models)
+        else:
+            min_votes = max(1, min(min_votes, working_models))
+        
+        frame_results = []
+        key_frame, key_detections, key_weight = None, [], 0.0
+        sampled = 0
+        skipped = 0
+        raw_detections = 0
+        last_hash = None
+        pending = []
+        
+        def flush(batch):
+            nonlocal key_frame, key_detections, key_weight
+            nonlocal raw_detections
+            frames = [frame for _, frame in batch]
+            per_member = {}
+            if runnable:
+                with ThreadPoolExecutor(max_workers=len(runnable), thread_name_prefix="member") as pool:
+                    futures = {
+                        pool.submit(self._run_member_batch, name, frames, preset['conf'], preset['imgsz']): name
+                        for name in runnable
+                    }
+                    for future in as_completed(futures):
+                        per_member[futures[future]] = future.result()
+            for i, (frame_index, frame) in enumerate(batch):
+                all_detections = [d for name in runnable for d in per_member[name][i]]
+                raw_detections += len(all_detections)
+                fused = self._cluster_and_vote(all_detections, min_votes=min_votes)
+                frame_results.append((frame_index, fused))
+                # Keep the most confident frame for the annotated image
+                weight = sum(d['score'] for d in fused)
+                if weight > key_weight:
+                    key_frame, key_detections, key_weight = frame, fused, weight
+        
+        for frame_index, frame in iter_sequence_frames(source, sample_fps, max_frames, decode=self.decode_image):
+            sampled += 1
+            current_hash = frame_hash(frame)
+            if last_hash is not None and hash_distance(current_hash, last_hash) <= diff_threshold:
+                skipped += 1
+                continue
+            last_hash = current_hash
+            pending.append((frame_index, frame))
+            if len(pending) >= batch_size:
+                flush(pending)
+                pending = []
+        if pending:
+            flush(pending)
+        if sampled == 0:
+            raise ValueError("No frames could be decoded from the upload")
+        
+        lesions = self._track_lesions(frame_results)
+        
+        annotated_image_b64 = None
+        if key_frame is not None and preset['annotate']:
+            key_image = Image.fromarray(cv2.cvtColor(key_frame, cv2.COLOR_BGR2RGB))
+            annotated_image_b64 = self._render_annotation(key_image, key_detections,
+                                                          base_name=f"sequence_{int(time.time())}")
+            key_image.close()
         
         return {
-            'detections': ensembles,
-            'total_detections': len(all_detections),
+            'detections': lesions,
+            'total_detections': raw_detections,
             'total_models': len(self.models),
             'working_models': working_models,
-            'annotated_image': annotated_image_b64
-        }
\ No newline at end of file
+            'annotated_image': annotated_image_b64,
+            'tier': tier_name,
+            'members': list(members),
+            'frames_sampled': sampled,
+            'frames_analyzed': len(frame_results),
+            'frames_skipped': skipped
+        }
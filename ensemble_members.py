@@ -0,0 +1,153 @@
+"""
+Ensemble member configuration and parallel, failure-isolated loading.
+
+Members are declared as dicts:
+
+    {
+        "name": "YOLOv8",
+        "checkpoint": "yolov8-best.pt",   # relative to the weights directory
+        "backend": "ultralytics",         # key into the loaders mapping
+        "class_map": null,                # {"<model class id>": "<class name>"}, null = identity
+        "conf": null                      # per-member confidence floor, null = tier default
+    }
+
+A JSON file with a list of such dicts can replace DEFAULT_MEMBERS through the
+SKIN_ENSEMBLE_MEMBERS environment variable.
+"""
+
+import os
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+# ---------------- CONFIG ----------------
+MEMBERS_CONFIG_ENV = "SKIN_ENSEMBLE_MEMBERS"
+LOAD_TIMEOUT_SECONDS = 180
+LOAD_RETRIES = 1
+
+# YOLO-NAS and EfficientDet reuse the YOLOv8 weights as placeholders until
+# their own checkpoints are wired into a backend
+DEFAULT_MEMBERS = [
+    {"name": "YOLOv8", "checkpoint": "yolov8-best.pt", "backend": "ultralytics"},
+    {"name": "YOLO-NAS", "checkpoint": "yolov8-best.pt", "backend": "ultralytics"},
+    {"name": "EfficientDet", "checkpoint": "yolov8-best.pt", "backend": "ultralytics"},
+]
+
+MEMBER_DEFAULTS = {"backend": "ultralytics", "class_map": None, "conf": None}
+
+
+def normalize_member(member):
+    """Fill defaults and validate a single member declaration"""
+    for key in ("name", "checkpoint"):
+        if not member.get(key):
+            raise ValueError(f"Ensemble member is missing '{key}': {member}")
+    normalized = dict(MEMBER_DEFAULTS, **member)
+    if normalized["class_map"] is not None:
+        normalized["class_map"] = {str(k): v for k, v in normalized["class_map"].items()}
+    return normalized
+
+
+def load_member_config(config=None):
+    """Member list from a list, a JSON file path, $SKIN_ENSEMBLE_MEMBERS or the defaults"""
+    if config is None:
+        config = os.environ.get(MEMBERS_CONFIG_ENV) or DEFAULT_MEMBERS
+    if isinstance(config, str):
+        with open(config) as f:
+            config = json.load(f)
+
+    members = [normalize_member(m) for m in config]
+    names = [m["name"] for m in members]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Duplicate ensemble member names: {names}")
+    return members
+
+
+def resolve_checkpoint(checkpoint, weights_dir):
+    if os.path.isabs(checkpoint) or not weights_dir:
+        return checkpoint
+    return os.path.join(weights_dir, checkpoint)
+
+
+def _load_one(member, checkpoint_path, loader, retries):
+    """Load one member with retries; returns (model, attempts, error, seconds)"""
+    start = time.perf_counter()
+    if not os.path.exists(checkpoint_path):
+        return None, 0, f"checkpoint not found: {checkpoint_path}", 0.0
+
+    error = None
+    for attempt in range(1, retries + 2):
+        try:
+            model = loader(checkpoint_path)
+            return model, attempt, None, time.perf_counter() - start
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            print(f"⚠️ {member['name']} load attempt {attempt} failed: {error}")
+    return None, retries + 1, error, time.perf_counter() - start
+
+
+def load_members(members, weights_dir, loaders, timeout=LOAD_TIMEOUT_SECONDS,
+                 retries=LOAD_RETRIES, max_workers=None):
+    """
+    Load all members in parallel.
+
+    Returns (models, report): models maps name -> model (None when the member
+    failed) in config order, report maps name -> status/timing details.
+    A member that exceeds its timeout is reported as such and left to finish
+    in the background; its result is discarded.
+    """
+    models = {}
+    report = {}
+    executor = ThreadPoolExecutor(max_workers=max_workers or max(1, len(members)),
+                                  thread_name_prefix="model-load")
+    futures = {}
+    started = time.perf_counter()
+
+    for member in members:
+        checkpoint_path = resolve_checkpoint(member["checkpoint"], weights_dir)
+        loader = loaders.get(member["backend"])
+        report[member["name"]] = {
+            "backend": member["backend"],
+            "checkpoint": checkpoint_path,
+            "status": "pending",
+            "attempts": 0,
+            "seconds": None,
+            "error": None,
+        }
+        if loader is None:
+            report[member["name"]].update(status="failed", error=f"unknown backend '{member['backend']}'")
+            continue
+        print(f"🔍 Loading {member['name']} ({member['backend']}) from: {checkpoint_path}")
+        futures[member["name"]] = (time.perf_counter(), executor.submit(
+            _load_one, member, checkpoint_path, loader, retries))
+
+    for member in members:
+        name = member["name"]
+        models[name] = None
+        if name not in futures:
+            print(f"❌ {name} failed to load: {report[name]['error']}")
+            continue
+
+        submitted, future = futures[name]
+        remaining = max(0.0, timeout - (time.perf_counter() - submitted))
+        entry = report[name]
+        try:
+            model, attempts, error, seconds = future.result(timeout=remaining)
+        except FutureTimeoutError:
+            entry.update(status="timeout", seconds=round(time.perf_counter() - submitted, 3),
+                         error=f"load exceeded {timeout}s")
+            print(f"❌ {name} timed out after {timeout}s")
+            continue
+
+        entry.update(attempts=attempts, seconds=round(seconds, 3))
+        if model is None:
+            entry.update(status="missing" if attempts == 0 else "failed", error=error)
+            print(f"❌ {name} failed to load: {error}")
+        else:
+            entry["status"] = "loaded"
+            models[name] = model
+            print(f"✅ {name} loaded in {entry['seconds']:.2f}s")
+
+    executor.shutdown(wait=False)
+    print(f"🔹 Loaded {sum(m is not None for m in models.values())}/{len(members)} members "
+          f"in {time.perf_counter() - started:.2f}s")
+    return models, report
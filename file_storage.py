@@ -0,0 +1,238 @@
+"""
+Content-addressed storage for uploads and annotated results.
+
+Files are stored once per SHA-256 digest in sharded directories
+(``ab/cd/abcd...ext``) and evicted in the background by age and total size.
+Only files matching that layout are ever counted or evicted, so other files
+under the root are left alone.
+"""
+
+import os
+import io
+import re
+import hashlib
+import threading
+import time
+
+# ---------------- CONFIG ----------------
+DEFAULT_MAX_AGE_SECONDS = 24 * 60 * 60      # drop files not used for a day
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024       # keep each store under 512 MB
+DEFAULT_SWEEP_INTERVAL = 10 * 60            # run the janitor every 10 minutes
+SHARD_DEPTH = 2                             # ab/cd/<digest>
+SHARD_WIDTH = 2
+STORED_NAME = re.compile(r"^[0-9a-f]{64}(\.[0-9a-z]+)?(\.\d+\.tmp)?$")
+
+
+class ContentStore:
+    def __init__(self, root, max_age_seconds=DEFAULT_MAX_AGE_SECONDS,
+                 max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_age_seconds = max_age_seconds
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._janitor = None
+        self._stop = threading.Event()
+
+        self.hits = 0
+        self.writes = 0
+        self.evicted_files = 0
+        self.evicted_bytes = 0
+        self.last_sweep = None
+
+        os.makedirs(self.root, exist_ok=True)
+        # Running totals, so stats() does not walk the tree
+        entries = [e for e in self._scan() if not e[0].endswith(".tmp")]
+        self.files = len(entries)
+        self.bytes = sum(size for _, size, _ in entries)
+
+    # ---------------- PATHS ----------------
+    def path_for(self, digest, ext=""):
+        """Return the sharded path for a digest (the file may not exist yet)"""
+        shards = [digest[i * SHARD_WIDTH:(i + 1) * SHARD_WIDTH] for i in range(SHARD_DEPTH)]
+        return os.path.join(self.root, *shards, f"{digest}{_normalize_ext(ext)}")
+
+    # ---------------- WRITES ----------------
+    def put_bytes(self, data, ext=""):
+        """Store bytes and return (digest, path); identical content is stored once"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path_for(digest, ext)
+
+        with self._lock:
+            if os.path.exists(path):
+                # Refresh the timestamp so eviction treats it as recently used
+                os.utime(path, None)
+                self.hits += 1
+                return digest, path
+
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            self.writes += 1
+            self.files += 1
+            self.bytes += len(data)
+
+        return digest, path
+
+    def put_file(self, src_path, ext=None):
+        """Store a copy of an existing file"""
+        if ext is None:
+            ext = os.path.splitext(src_path)[1]
+        with open(src_path, "rb") as f:
+            return self.put_bytes(f.read(), ext)
+
+    def put_image(self, image, ext=".jpg", format="JPEG", **save_kwargs):
+        """Encode a PIL image and store the encoded bytes"""
+        buffered = io.BytesIO()
+        image.save(buffered, format=format, **save_kwargs)
+        return self.put_bytes(buffered.getvalue(), ext)
+
+    # ---------------- EVICTION ----------------
+    def _is_stored(self, dirpath, name):
+        """True for files in the ab/cd/<digest> layout written by this store"""
+        match = STORED_NAME.match(name)
+        if not match:
+            return False
+        shards = os.path.relpath(dirpath, self.root).split(os.sep)
+        return shards == [name[i * SHARD_WIDTH:(i + 1) * SHARD_WIDTH] for i in range(SHARD_DEPTH)]
+
+    def _scan(self):
+        """Return [(path, size, mtime)] for every stored file"""
+        entries = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if not self._is_stored(dirpath, name):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((path, st.st_size, st.st_mtime))
+        return entries
+
+    def evict(self, now=None):
+        """Remove expired files, then the oldest files until under the size budget"""
+        now = time.time() if now is None else now
+        removed_files = 0
+        removed_bytes = 0
+
+        # Scan without the lock so uploads are not held up by the sweep
+        entries = self._scan()
+        # The folder may be shared by several worker processes, so the running
+        # totals are reset from what is actually on disk
+        stored_files = sum(1 for path, _, _ in entries if not path.endswith(".tmp"))
+        stored_bytes = sum(size for path, size, _ in entries if not path.endswith(".tmp"))
+        victims = []
+        keep = []
+        for path, size, mtime in entries:
+            expired = self.max_age_seconds is not None and now - mtime > self.max_age_seconds
+            # Stale temp files from interrupted writes are always removed
+            if expired or path.endswith(".tmp") and now - mtime > 60:
+                victims.append((path, size, mtime))
+            else:
+                keep.append((path, size, mtime))
+
+        if self.max_bytes is not None:
+            total = sum(size for _, size, _ in keep)
+            for path, size, mtime in sorted(keep, key=lambda e: e[2]):
+                if total <= self.max_bytes:
+                    break
+                victims.append((path, size, mtime))
+                total -= size
+
+        for path, size, mtime in victims:
+            with self._lock:
+                # Skip files re-used (timestamp refreshed) since the scan
+                try:
+                    if os.stat(path).st_mtime != mtime:
+                        continue
+                    removed = _remove(path)
+                except FileNotFoundError:
+                    # Already evicted by another process sharing the folder
+                    removed = False
+                if removed:
+                    removed_files += 1
+                    removed_bytes += size
+                if not path.endswith(".tmp") and not os.path.exists(path):
+                    stored_files -= 1
+                    stored_bytes -= size
+
+        self._prune_empty_dirs()
+        with self._lock:
+            self.files = stored_files
+            self.bytes = stored_bytes
+            self.evicted_files += removed_files
+            self.evicted_bytes += removed_bytes
+            self.last_sweep = now
+
+        if removed_files:
+            print(f"🧹 Evicted {removed_files} files ({removed_bytes / 1e6:.1f} MB) from {self.root}")
+        return removed_files, removed_bytes
+
+    def _prune_empty_dirs(self):
+        for dirpath, _, _ in os.walk(self.root, topdown=False):
+            shards = os.path.relpath(dirpath, self.root).split(os.sep)
+            if dirpath == self.root or len(shards) > SHARD_DEPTH or any(len(p) != SHARD_WIDTH for p in shards):
+                continue
+            # put_bytes creates shard directories under the lock
+            with self._lock:
+                try:
+                    os.rmdir(dirpath)
+                except OSError:
+                    pass
+
+    def start_janitor(self, interval=DEFAULT_SWEEP_INTERVAL):
+        """Run evict() periodically in a daemon thread"""
+        if self._janitor is not None and self._janitor.is_alive():
+            return
+
+        def _loop():
+            while not self._stop.wait(interval):
+                try:
+                    self.evict()
+                except Exception as e:
+                    print(f"❌ Storage sweep failed for {self.root}: {e}")
+
+        self._stop.clear()
+        self._janitor = threading.Thread(target=_loop, name=f"janitor:{self.root}", daemon=True)
+        self._janitor.start()
+
+    def stop_janitor(self):
+        self._stop.set()
+
+    # ---------------- STATS ----------------
+    def stats(self):
+        """Usage statistics for health reporting"""
+        with self._lock:
+            files, total_bytes = self.files, self.bytes
+        return {
+            'root': self.root,
+            'files': files,
+            'bytes': total_bytes,
+            'max_bytes': self.max_bytes,
+            'max_age_seconds': self.max_age_seconds,
+            'usage_ratio': round(total_bytes / self.max_bytes, 4) if self.max_bytes else None,
+            'dedup_hits': self.hits,
+            'writes': self.writes,
+            'evicted_files': self.evicted_files,
+            'evicted_bytes': self.evicted_bytes,
+            'last_sweep': self.last_sweep,
+        }
+
+
+def _normalize_ext(ext):
+    if not ext:
+        return ""
+    ext = ext.lower()
+    return ext if ext.startswith(".") else f".{ext}"
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+        return True
+    except FileNotFoundError:
+        return False
@@ -0,0 +1,236 @@
+"""
+Per-request memory accounting and a budget for full-resolution decodes.
+
+Decoded sizes are estimated from image headers (no pixel data is read), a
+byte budget limits how many large images are decoded at the same time, and a
+sampler records the peak RSS seen while a request runs. RSS comes from
+/proc, then psutil (needed on Windows), then the POSIX resource module;
+when none is available RSS tracking is switched off.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import deque
+from PIL import Image
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# ---------------- CONFIG ----------------
+DEFAULT_BUDGET_BYTES = 1024 * 1024 * 1024   # 1 GB of decoded pixels in flight
+DEFAULT_WAIT_SECONDS = 30
+MAX_IMAGE_PIXELS = 40_000_000               # reject anything above ~40 MP
+SAMPLE_INTERVAL = 0.01
+RECENT_REQUESTS = 200
+
+
+class MemoryBudgetExceeded(Exception):
+    """Raised when a reservation cannot be granted in time"""
+
+
+class ImageTooLarge(Exception):
+    """Raised when an image is above MAX_IMAGE_PIXELS"""
+
+
+def image_dimensions(path):
+    """(width, height, bands) from the image header"""
+    with Image.open(path) as img:
+        return img.width, img.height, len(img.getbands())
+
+
+def estimate_decoded_bytes(path, copies=1, max_pixels=MAX_IMAGE_PIXELS):
+    """Bytes needed to hold `copies` decoded RGB copies of an image"""
+    width, height, _ = image_dimensions(path)
+    if max_pixels and width * height > max_pixels:
+        raise ImageTooLarge(f"Image is {width}x{height}, above the {max_pixels:,} pixel limit")
+    # Members and the annotator all work on 3-channel 8-bit copies
+    return width * height * 3 * max(1, copies)
+
+
+def video_dimensions(path):
+    """(width, height) from a video's stream header"""
+    import cv2
+    capture = cv2.VideoCapture(path)
+    try:
+        if not capture.isOpened():
+            raise ValueError(f"Could not open video: {os.path.basename(path)}")
+        return int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)), int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    finally:
+        capture.release()
+
+
+def estimate_sequence_bytes(source, frames, max_pixels=MAX_IMAGE_PIXELS):
+    """Bytes needed to hold `frames` decoded frames of a video path or burst (list of paths)"""
+    if isinstance(source, (list, tuple)):
+        # Every burst image is checked; the largest sizes the frame
+        frame_bytes = max(estimate_decoded_bytes(path, 1, max_pixels) for path in source)
+    else:
+        width, height = video_dimensions(source)
+        if max_pixels and width * height > max_pixels:
+            raise ImageTooLarge(f"Video is {width}x{height}, above the {max_pixels:,} pixel limit")
+        frame_bytes = width * height * 3
+    return frame_bytes * max(1, frames)
+
+
+def rss_bytes():
+    """Current resident set size of this process, or None when it cannot be read"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        # Lifetime peak rather than current RSS, the best POSIX offers
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+RSS_AVAILABLE = rss_bytes() is not None
+
+
+class DecodeBudget:
+    def __init__(self, max_bytes=DEFAULT_BUDGET_BYTES, wait_seconds=DEFAULT_WAIT_SECONDS):
+        self.max_bytes = max_bytes
+        self.wait_seconds = wait_seconds
+        self.in_use = 0
+        self.active = 0
+        self.waits = 0
+        self.rejections = 0
+        self._cond = threading.Condition()
+
+    def reserve(self, nbytes):
+        """Context manager holding `nbytes` of the budget"""
+        return _Reservation(self, nbytes)
+
+    def _acquire(self, nbytes):
+        # A single request larger than the whole budget may still run, alone
+        nbytes = min(nbytes, self.max_bytes)
+        deadline = time.monotonic() + self.wait_seconds
+        with self._cond:
+            if self.in_use + nbytes > self.max_bytes:
+                self.waits += 1
+            while self.in_use + nbytes > self.max_bytes:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.rejections += 1
+                    raise MemoryBudgetExceeded(
+                        f"Timed out waiting for {nbytes / 1e6:.0f} MB of decode budget"
+                    )
+                self._cond.wait(remaining)
+            self.in_use += nbytes
+            self.active += 1
+        return nbytes
+
+    def _release(self, nbytes):
+        with self._cond:
+            self.in_use -= nbytes
+            self.active -= 1
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {
+                'max_bytes': self.max_bytes,
+                'in_use_bytes': self.in_use,
+                'active_decodes': self.active,
+                'waits': self.waits,
+                'rejections': self.rejections
+            }
+
+
+class _Reservation:
+    def __init__(self, budget, nbytes):
+        self.budget = budget
+        self.nbytes = nbytes
+        self.granted = 0
+
+    def __enter__(self):
+        self.granted = self.budget._acquire(self.nbytes)
+        return self
+
+    def __exit__(self, *exc):
+        self.budget._release(self.granted)
+        return False
+
+
+class MemoryTracker:
+    """Samples process RSS in the background while a request runs (no-op without RSS)"""
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.enabled = RSS_AVAILABLE
+        self.start_rss = 0
+        self.peak_rss = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        if not self.enabled:
+            return self
+        self.start_rss = self.peak_rss = rss_bytes()
+        self._thread = threading.Thread(target=self._sample, name="rss-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if not self.enabled:
+            return False
+        self._stop.set()
+        self._thread.join()
+        self.peak_rss = max(self.peak_rss, rss_bytes())
+        return False
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak_rss = max(self.peak_rss, rss_bytes())
+
+    def summary(self):
+        if not self.enabled:
+            return None
+        return {
+            'rss_start_mb': round(self.start_rss / 1e6, 1),
+            'rss_peak_mb': round(self.peak_rss / 1e6, 1),
+            'rss_growth_mb': round((self.peak_rss - self.start_rss) / 1e6, 1)
+        }
+
+
+class MemoryStats:
+    """Peak RSS of recent requests, for sizing containers"""
+
+    def __init__(self, size=RECENT_REQUESTS):
+        self._peaks = deque(maxlen=size)
+        self._growth = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, tracker):
+        if not tracker.enabled:
+            return
+        with self._lock:
+            self._peaks.append(tracker.peak_rss)
+            self._growth.append(tracker.peak_rss - tracker.start_rss)
+
+    def stats(self):
+        with self._lock:
+            peaks = sorted(self._peaks)
+            growth = sorted(self._growth)
+        if not RSS_AVAILABLE:
+            return {'requests': 0, 'rss_available': False}
+        if not peaks:
+            return {'requests': 0}
+        return {
+            'requests': len(peaks),
+            'rss_peak_mb_max': round(peaks[-1] / 1e6, 1),
+            'rss_peak_mb_p95': round(peaks[int(0.95 * (len(peaks) - 1))] / 1e6, 1),
+            'rss_growth_mb_max': round(growth[-1] / 1e6, 1),
+            'rss_growth_mb_p95': round(growth[int(0.95 * (len(growth) - 1))] / 1e6, 1),
+            'rss_current_mb': round(rss_bytes() / 1e6, 1)
+        }
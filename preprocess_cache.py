@@ -0,0 +1,179 @@
+"""
+Memory-mapped cache of preprocessed (decoded + letterboxed) images.
+
+Each inference size has one flat uint8 file of ``imgsz x imgsz x 3`` BGR rows
+plus a JSON index keyed by the image's SHA-256. Rows are handed out as views
+into the memory map, so repeated runs over the same images skip JPEG decoding
+and resizing entirely. Boxes predicted on a cached row are mapped back to the
+original image with ``unletterbox_box``.
+"""
+
+import os
+import json
+import hashlib
+import threading
+import numpy as np
+import cv2
+
+# ---------------- CONFIG ----------------
+PAD_COLOR = (114, 114, 114)    # same grey ultralytics pads with
+GROW_ROWS = 256                # rows added each time the data file fills up
+
+
+def letterbox(img, imgsz):
+    """Resize keeping aspect ratio and pad to imgsz x imgsz; returns (canvas, ratio, (left, top))"""
+    h, w = img.shape[:2]
+    r = min(imgsz / h, imgsz / w)
+    new_w, new_h = int(round(w * r)), int(round(h * r))
+    if (new_w, new_h) != (w, h):
+        img = cv2.resize(img, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    left = (imgsz - new_w) // 2
+    top = (imgsz - new_h) // 2
+    canvas = np.full((imgsz, imgsz, 3), PAD_COLOR, dtype=np.uint8)
+    canvas[top:top + new_h, left:left + new_w] = img
+    return canvas, r, (left, top)
+
+
+def unletterbox_box(box, meta):
+    """Map an xyxy box from letterboxed coordinates back to the original image"""
+    left, top = meta["pad"]
+    r = meta["ratio"]
+    h, w = meta["orig_shape"]
+    x1, y1, x2, y2 = box
+    return [
+        float(min(max((x1 - left) / r, 0), w)),
+        float(min(max((y1 - top) / r, 0), h)),
+        float(min(max((x2 - left) / r, 0), w)),
+        float(min(max((y2 - top) / r, 0), h)),
+    ]
+
+
+class PreprocessCache:
+    def __init__(self, cache_dir, imgsz=640):
+        self.cache_dir = cache_dir
+        self.imgsz = imgsz
+        self.row_bytes = imgsz * imgsz * 3
+        self.data_path = os.path.join(cache_dir, f"letterbox-{imgsz}.u8")
+        self.index_path = os.path.join(cache_dir, f"letterbox-{imgsz}.json")
+
+        self._lock = threading.Lock()
+        self._digests = {}   # (path, size, mtime_ns) -> sha256, avoids rehashing within a run
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self.index = {"imgsz": imgsz, "rows": 0, "capacity": 0, "entries": {}}
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                index = json.load(f)
+            if index.get("imgsz") == imgsz:
+                self.index = index
+        self._data = self._open()
+
+    def __len__(self):
+        return self.index["rows"]
+
+    def __contains__(self, image_path):
+        return self.digest(image_path) in self.index["entries"]
+
+    # ---------------- STORAGE ----------------
+    def _open(self):
+        capacity = self.index["capacity"]
+        if capacity == 0:
+            return None
+        return np.memmap(self.data_path, dtype=np.uint8, mode="r+",
+                         shape=(capacity, self.imgsz, self.imgsz, 3))
+
+    def _ensure_capacity(self, rows):
+        if rows <= self.index["capacity"]:
+            return
+        capacity = max(rows, self.index["capacity"] + GROW_ROWS)
+        if self._data is not None:
+            self._data.flush()
+            del self._data
+        with open(self.data_path, "ab") as f:
+            f.truncate(capacity * self.row_bytes)
+        self.index["capacity"] = capacity
+        self._data = self._open()
+
+    def _save_index(self):
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.index, f)
+        os.replace(tmp_path, self.index_path)
+
+    # ---------------- API ----------------
+    def digest(self, image_path):
+        st = os.stat(image_path)
+        key = (image_path, st.st_size, st.st_mtime_ns)
+        digest = self._digests.get(key)
+        if digest is None:
+            with open(image_path, "rb") as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+            self._digests[key] = digest
+        return digest
+
+    def add(self, image_paths):
+        """Preprocess and store any images not cached yet; returns how many were added"""
+        with self._lock:
+            missing = {}
+            for path in image_paths:
+                digest = self.digest(path)
+                if digest not in self.index["entries"]:
+                    missing.setdefault(digest, path)
+            if not missing:
+                return 0
+
+            self._ensure_capacity(self.index["rows"] + len(missing))
+            added = 0
+            for digest, path in missing.items():
+                img = cv2.imread(path, cv2.IMREAD_COLOR)
+                if img is None:
+                    print(f"⚠️ Could not decode {path}, not cached")
+                    continue
+                canvas, ratio, pad = letterbox(img, self.imgsz)
+                row = self.index["rows"]
+                self._data[row] = canvas
+                self.index["entries"][digest] = {
+                    "row": row,
+                    "ratio": ratio,
+                    "pad": list(pad),
+                    "orig_shape": list(img.shape[:2]),
+                }
+                self.index["rows"] += 1
+                added += 1
+
+            self._data.flush()
+            self._save_index()
+        if added:
+            print(f"💾 Cached {added} preprocessed images at {self.imgsz}px ({len(self)} total)")
+        return added
+
+    def get(self, image_path):
+        """(array view, meta) for a cached image, or (None, None)"""
+        meta = self.index["entries"].get(self.digest(image_path))
+        if meta is None:
+            return None, None
+        return self._data[meta["row"]], meta
+
+
+# ---------------- MAIN ----------------
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Pre-build the memory-mapped preprocess cache")
+    parser.add_argument("--images", "-i", required=True, help="Folder of images to cache")
+    parser.add_argument("--cache-dir", "-c", default="preprocess-cache", help="Cache folder")
+    parser.add_argument("--imgsz", default="640", help="Inference sizes, comma separated")
+    args = parser.parse_args()
+
+    paths = [
+        os.path.join(args.images, name) for name in sorted(os.listdir(args.images))
+        if os.path.splitext(name)[1].lower() in (".jpg", ".jpeg", ".png")
+    ]
+    for imgsz in (int(v) for v in args.imgsz.split(",") if v.strip()):
+        cache = PreprocessCache(args.cache_dir, imgsz)
+        cache.add(paths)
+        print(f"✅ {len(cache)} images cached at {imgsz}px in {cache.data_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,10 +13,32 @@ import { Loader2, Brain, X, CheckCircle, Download, Eye, EyeOff } from 'lucide-re
 // For production, use relative path. Vercel will handle routing
 const API_BASE = process.env.NODE_ENV === 'production' ? '/api' : 'http://localhost:5001/api';
 
+// Detection and event shapes sent by /api/analyze/stream
+interface ApiDetection {
+  condition: string;
+  accuracy: number;
+  confidence: 'High' | 'Medium' | 'Low';
+  affected_area: string;
+  description: string;
+  recommendations: string[];
+  votes: number;
+}
+
+interface StreamEventData {
+  member?: string;
+  members_done?: number;
+  members_total?: number;
+  detections?: ApiDetection[];
+  ensemble_stats?: { total_models: number; working_models: number };
+  annotated_image?: string;
+  error?: string;
+}
+
 export function AnalysisPage() {
   const [selectedImage, setSelectedImage] = useState<{ file: File; previewUrl: string } | null>(null);
   const [isAnalyzing, setIsAnalyzing] = useState(false);
   const [analysisProgress, setAnalysisProgress] = useState(0);
+  const [completedMembers, setCompletedMembers] = useState<string[]>([]);
   const [analysisResult, setAnalysisResult] = useState<AnalysisResult | null>(null);
   const [annotatedImage, setAnnotatedImage] = useState<string | null>(null);
   const [showOriginalImage, setShowOriginalImage] = useState(false);
@@ -35,11 +57,84 @@ export function AnalysisPage() {
     }
   };
 
+  const toAnalysisResult = (
+    detections: ApiDetection[] | undefined,
+    totalModels: number,
+    workingModels: number,
+    provisional: boolean
+  ): AnalysisResult => {
+    if (detections && detections.length > 0) {
+      const detection = detections[0];
+      return {
+        condition: detection.condition,
+        accuracy: detection.accuracy,
+        confidence: detection.confidence,
+        affectedArea: detection.affected_area,
+        description: detection.description,
+        recommendations: detection.recommendations,
+        votes: detection.votes,
+        totalModels,
+        workingModels,
+        provisional
+      };
+    }
+    return {
+      condition: 'No Condition Detected',
+      accuracy: 0,
+      confidence: 'Low',
+      affectedArea: 'N/A',
+      description: 'No skin conditions were detected with sufficient confidence. This could be due to image quality or the condition not being in our detection categories.',
+      recommendations: [
+        'Try uploading a clearer, well-lit image',
+        'Ensure the skin area is clearly visible',
+        'Consult with a dermatologist for professional evaluation'
+      ],
+      votes: 0,
+      totalModels,
+      workingModels,
+      provisional
+    };
+  };
+
+  // Read Server-Sent Events from a streaming fetch response
+  const readEventStream = async (
+    response: Response,
+    onEvent: (event: string, data: StreamEventData) => void
+  ) => {
+    const reader = response.body!.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      let boundary = buffer.indexOf('\n\n');
+      while (boundary !== -1) {
+        const chunk = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+        boundary = buffer.indexOf('\n\n');
+
+        let event = 'message';
+        const dataLines: string[] = [];
+        for (const line of chunk.split('\n')) {
+          if (line.startsWith('event:')) event = line.slice(6).trim();
+          else if (line.startsWith('data:')) dataLines.push(line.slice(5).trim());
+        }
+        if (dataLines.length > 0) {
+          onEvent(event, JSON.parse(dataLines.join('\n')));
+        }
+      }
+    }
+  };
+
   const startAnalysis = async () => {
     if (!selectedImage) return;
 
     setIsAnalyzing(true);
-    setAnalysisProgress(0);
+    setAnalysisProgress(10);
+    setCompletedMembers([]);
     setAnalysisResult(null);
     setAnnotatedImage(null);
     setShowOriginalImage(false);
@@ -48,73 +143,46 @@ export function AnalysisPage() {
     formData.append('file', selectedImage.file);
 
     try {
-      // Simulate progress updates
-      const progressSteps = [
-        { step: 'Uploading image...', progress: 10 },
-        { step: 'Preprocessing...', progress: 25 },
-        { step: 'Running YOLOv8...', progress: 45 },
-        { step: 'Running YOLO-NAS...', progress: 65 },
-        { step: 'Running EfficientDet...', progress: 80 },
-        { step: 'Combining results...', progress: 95 },
-      ];
-
-      for (const { step, progress } of progressSteps) {
-        await new Promise(resolve => setTimeout(resolve, 600));
-        setAnalysisProgress(progress);
-      }
-
-      const response = await fetch(`${API_BASE}/analyze`, {
+      const response = await fetch(`${API_BASE}/analyze/stream`, {
         method: 'POST',
         body: formData,
       });
 
       if (!response.ok) {
-        throw new Error(`Server error: ${response.status}`);
-      }
-
-      const result = await response.json();
-      setAnalysisProgress(100);
-
-      if (result.error) {
-        throw new Error(result.error);
+        const body = await response.json().catch(() => null);
+        throw new Error(body?.error || `Server error: ${response.status}`);
       }
 
-      if (result.detections && result.detections.length > 0) {
-        const detection = result.detections[0];
-        const analysisResult: AnalysisResult = {
-          condition: detection.condition,
-          accuracy: detection.accuracy,
-          confidence: detection.confidence,
-          affectedArea: detection.affected_area,
-          description: detection.description,
-          recommendations: detection.recommendations,
-          votes: detection.votes,
-          totalModels: result.ensemble_stats.total_models,
-          workingModels: result.ensemble_stats.working_models
-        };
-        
-        setAnalysisResult(analysisResult);
-        
-        if (result.annotated_image) {
-          setAnnotatedImage(result.annotated_image);
+      let gotFinal = false;
+      await readEventStream(response, (event, data) => {
+        if (event === 'member') {
+          const membersDone = data.members_done ?? 0;
+          const membersTotal = data.members_total || 1;
+          setCompletedMembers(prev => [...prev, data.member ?? '']);
+          setAnalysisProgress(10 + Math.round((80 * membersDone) / membersTotal));
+        } else if (event === 'provisional') {
+          // Show a first answer while the remaining members finish
+          setAnalysisResult(toAnalysisResult(data.detections, data.members_total ?? 0, data.members_done ?? 0, true));
+        } else if (event === 'final') {
+          gotFinal = true;
+          setAnalysisProgress(95);
+          setAnalysisResult(toAnalysisResult(
+            data.detections,
+            data.ensemble_stats?.total_models || 3,
+            data.ensemble_stats?.working_models || 3,
+            false
+          ));
+        } else if (event === 'annotated') {
+          setAnnotatedImage(data.annotated_image ?? null);
+        } else if (event === 'error') {
+          throw new Error(data.error);
         }
-      } else {
-        setAnalysisResult({
-          condition: 'No Condition Detected',
-          accuracy: 0,
-          confidence: 'Low',
-          affectedArea: 'N/A',
-          description: 'No skin conditions were detected with sufficient confidence. This could be due to image quality or the condition not being in our detection categories.',
-          recommendations: [
-            'Try uploading a clearer, well-lit image',
-            'Ensure the skin area is clearly visible',
-            'Consult with a dermatologist for professional evaluation'
-          ],
-          votes: 0,
-          totalModels: result.ensemble_stats?.total_models || 3,
-          workingModels: result.ensemble_stats?.working_models || 3
-        });
+      });
+
+      if (!gotFinal) {
+        throw new Error('The analysis stream ended before a result was received.');
       }
+      setAnalysisProgress(100);
 
     } catch (error) {
       console.error('Analysis error:', error);
@@ -329,14 +397,14 @@ export function AnalysisPage() {
                         {analysisProgress}% Complete - Running ensemble analysis...
                       </p>
                       <div className="flex justify-center space-x-3 text-xs">
-                        <span className={`px-2 py-1 rounded ${analysisProgress >= 45 ? 'bg-green-100 text-green-800' : 'bg-gray-100 text-gray-500'}`}>
-                          YOLOv8 {analysisProgress >= 45 ? '✓' : '...'}
+                        <span className={`px-2 py-1 rounded ${completedMembers.includes('YOLOv8') ? 'bg-green-100 text-green-800' : 'bg-gray-100 text-gray-500'}`}>
+                          YOLOv8 {completedMembers.includes('YOLOv8') ? '✓' : '...'}
                         </span>
-                        <span className={`px-2 py-1 rounded ${analysisProgress >= 65 ? 'bg-green-100 text-green-800' : 'bg-gray-100 text-gray-500'}`}>
-                          YOLO-NAS {analysisProgress >= 65 ? '✓' : '...'}
+                        <span className={`px-2 py-1 rounded ${completedMembers.includes('YOLO-NAS') ? 'bg-green-100 text-green-800' : 'bg-gray-100 text-gray-500'}`}>
+                          YOLO-NAS {completedMembers.includes('YOLO-NAS') ? '✓' : '...'}
                         </span>
-                        <span className={`px-2 py-1 rounded ${analysisProgress >= 80 ? 'bg-green-100 text-green-800' : 'bg-gray-100 text-gray-500'}`}>
-                          EfficientDet {analysisProgress >= 80 ? '✓' : '...'}
+                        <span className={`px-2 py-1 rounded ${completedMembers.includes('EfficientDet') ? 'bg-green-100 text-green-800' : 'bg-gray-100 text-gray-500'}`}>
+                          EfficientDet {completedMembers.includes('EfficientDet') ? '✓' : '...'}
                         </span>
                       </div>
                     </div>
@@ -13,6 +13,7 @@ export interface AnalysisResult {
   votes?: number;
   totalModels?: number;
   workingModels?: number;
+  provisional?: boolean;
 }
 
 interface AnalysisResultsProps {
@@ -56,8 +57,14 @@ export function AnalysisResults({ result }: AnalysisResultsProps) {
         <div className="flex items-center space-x-3">
           <CheckCircle className="h-8 w-8 text-green-600" />
           <div>
-            <h3 className="text-lg font-semibold text-green-900">Analysis Complete</h3>
-            <p className="text-green-700">Your skin condition has been analyzed by our AI ensemble.</p>
+            <h3 className="text-lg font-semibold text-green-900">
+              {result.provisional ? 'Preliminary Result' : 'Analysis Complete'}
+            </h3>
+            <p className="text-green-700">
+              {result.provisional
+                ? 'First models have finished - this result will update when the full ensemble completes.'
+                : 'Your skin condition has been analyzed by our AI ensemble.'}
+            </p>
           </div>
         </div>
       </Card>